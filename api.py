@@ -0,0 +1,269 @@
+"""Local HTTP JSON API for compliance checks and PDF reports.
+
+Lets other plant systems run analyses without the Streamlit UI. All
+requests share the process-wide standards registry and report cache.
+
+    python api.py --port 8502
+
+    GET  /health       -> {"status": "ok", "db_version": ...}
+    GET  /parameters   -> {"parameters": [...]}
+    GET  /stats        -> shared cache sizes and hit/miss counters
+    POST /analyze      {"batch": [{"name": ..., "value": ...}]}
+                       or {"samples": [{"sample_id": ..., "batch": [...]}]}
+    POST /report       {"batch": [...]}  -> application/pdf
+    POST /proposal     generate_proposal() inputs -> application/pdf
+    POST /proposal/sweep  inputs plus "growth_rates", "design_periods" and
+                       optional "per_capita" lists -> application/pdf,
+                       or the scenario grid as JSON with "format": "json"
+                       (at most sweep.MAX_JSON_SCENARIOS rows)
+
+/analyze and /report accept an optional "authorities" list to evaluate
+only those standards; omitted or empty means every authority, and names
+not in the DB are rejected.
+
+database.json is watched in the background (WATERCHECK_DB_WATCH seconds,
+default 2) and edits are swapped in without a restart. Each request
+is answered from a single DB version, reported as "db_version".
+"""
+import argparse
+import json
+import math
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import engine
+import sweep
+from cache import PROPOSAL_FIELDS, cache_stats, cached_analysis, cached_pdf, cached_proposal
+from logic import WATCH_INTERVAL, check_authorities, get_db_version, get_parameter_names, plain_results, registry
+
+MAX_BODY = 10 * 1024 * 1024
+
+
+class BadRequest(Exception):
+    pass
+
+
+# --- PAYLOAD HELPERS ---
+def parse_batch(batch):
+    if not isinstance(batch, list) or not batch:
+        raise BadRequest("'batch' must be a non-empty list of {name, value} items")
+    items = []
+    for item in batch:
+        try:
+            value = float(item["value"])
+            name = str(item["name"])
+        except (KeyError, TypeError, ValueError):
+            raise BadRequest(f"invalid batch item: {item!r}")
+        if not math.isfinite(value):
+            raise BadRequest(f"non-finite value in batch item: {item!r}")
+        items.append({"name": name, "value": value})
+    return items
+
+
+def parse_authorities(payload):
+    authorities = payload.get("authorities")
+    if authorities is None:
+        return None
+    if not isinstance(authorities, list) or not all(isinstance(a, str) for a in authorities):
+        raise BadRequest("'authorities' must be a list of authority names")
+    try:
+        return check_authorities(authorities)
+    except ValueError as e:
+        raise BadRequest(str(e))
+
+
+def check_text_fields(payload):
+    """Proposal name, source and type must be strings"""
+    for field in ("name", "source", "type"):
+        if not isinstance(payload[field], str):
+            raise BadRequest(f"'{field}' must be a string")
+
+
+def public_results(pdf_data):
+    """Copy of analysis results without the PDF-only color/symbol fields"""
+    return plain_results(pdf_data, display=False)
+
+
+def summarize(pdf_data):
+    unsafe = sum(1 for res in pdf_data if any(s["status"] == "FAIL" for s in res["standards"]))
+    return {"total": len(pdf_data), "safe": len(pdf_data) - unsafe, "unsafe": unsafe}
+
+
+# --- HANDLERS ---
+def handle_analyze(payload):
+    if "samples" in payload:
+        samples = payload["samples"]
+        if not isinstance(samples, list):
+            raise BadRequest("'samples' must be a list")
+        ids = [s.get("sample_id", i) if isinstance(s, dict) else i for i, s in enumerate(samples)]
+        batches = [parse_batch(s.get("batch") if isinstance(s, dict) else None) for s in samples]
+        ev = engine.evaluate_batches(batches, authorities=parse_authorities(payload))
+        return {
+            "db_version": get_db_version(),
+            "samples": [
+                {"sample_id": sid, "summary": ev.summary(i), "results": public_results(ev.results(i))}
+                for i, sid in enumerate(ids)
+            ],
+        }
+    pdf_data = cached_analysis(parse_batch(payload.get("batch")), parse_authorities(payload))
+    return {"db_version": get_db_version(), "summary": summarize(pdf_data), "results": public_results(pdf_data)}
+
+
+def handle_report(payload):
+    return cached_pdf(parse_batch(payload.get("batch")), parse_authorities(payload))
+
+
+def handle_proposal(payload):
+    missing = [f for f in PROPOSAL_FIELDS if f not in payload]
+    if missing:
+        raise BadRequest(f"missing proposal fields: {', '.join(missing)}")
+    check_text_fields(payload)
+    try:
+        inputs = dict(payload, pop_current=int(payload["pop_current"]),
+                      growth_rate=float(payload["growth_rate"]), design_period=int(payload["design_period"]))
+    except (TypeError, ValueError, OverflowError):
+        raise BadRequest("pop_current, growth_rate and design_period must be finite numbers")
+    if not math.isfinite(inputs["growth_rate"]):
+        raise BadRequest("growth_rate must be finite")
+    try:   # same int64 bounds as the sweep, so the projection cannot overflow
+        sweep.project_population(inputs["pop_current"], [inputs["growth_rate"]], [inputs["design_period"]],
+                                 inputs["type"] == sweep.GEOMETRIC)
+    except (ValueError, OverflowError):
+        raise BadRequest("projected population is outside the supported range")
+    return cached_proposal(inputs)
+
+
+def handle_sweep(payload):
+    missing = [f for f in ("name", "source", "type", "pop_current", "growth_rates", "design_periods")
+               if f not in payload]
+    if missing:
+        raise BadRequest(f"missing sweep fields: {', '.join(missing)}")
+    check_text_fields(payload)
+    as_json = payload.get("format") == "json"
+    try:
+        result = sweep.sweep(dict(payload, pop_current=int(payload["pop_current"])),
+                             payload["growth_rates"], payload["design_periods"], payload.get("per_capita"),
+                             limit=sweep.MAX_JSON_SCENARIOS if as_json else sweep.MAX_SCENARIOS)
+    except (TypeError, OverflowError):
+        raise BadRequest("pop_current and the sweep axes must be finite numbers")
+    except ValueError as e:
+        raise BadRequest(f"invalid sweep: {e}")
+    if as_json:
+        return {"scenarios": result.rows()}
+    return sweep.sweep_pdf(result, as_bytes=True)
+
+
+GET_ROUTES = {
+    "/health": lambda: {"status": "ok", "db_version": get_db_version()},
+    "/parameters": lambda: {"parameters": list(get_parameter_names())},
+    "/stats": cache_stats,
+}
+POST_ROUTES = {
+    "/analyze": handle_analyze,
+    "/report": handle_report,
+    "/proposal": handle_proposal,
+    "/proposal/sweep": handle_sweep,
+}
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    server_version = "WaterCheck/1.0"
+    protocol_version = "HTTP/1.1"
+    timeout = 30   # idle keep-alive connections must not pin pool workers
+
+    def do_GET(self):
+        route = GET_ROUTES.get(self.path.split("?", 1)[0])
+        if route is None:
+            return self.send_json(404, {"error": "not found"})
+        with registry.pinned():
+            result = route()
+        self.send_json(200, result)
+
+    def do_POST(self):
+        route = POST_ROUTES.get(self.path.split("?", 1)[0])
+        if route is None:
+            return self.send_json(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length > MAX_BODY:
+                self.close_connection = True
+                return self.send_json(413, {"error": "request body too large"})
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                raise BadRequest("body is not valid JSON")
+            if not isinstance(payload, dict):
+                raise BadRequest("body must be a JSON object")
+            with registry.pinned():
+                result = route(payload)
+        except BadRequest as e:
+            return self.send_json(400, {"error": str(e)})
+        except Exception as e:
+            self.log_error("%s failed: %r", self.path, e)
+            return self.send_json(500, {"error": "internal error"})
+
+        if isinstance(result, bytes):
+            self.send_body(200, result, "application/pdf")
+        else:
+            self.send_json(200, result)
+
+    def send_json(self, status, obj):
+        self.send_body(status, json.dumps(obj, ensure_ascii=False).encode("utf-8"), "application/json")
+
+    def send_body(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that hands each connection to a bounded thread pool"""
+
+    request_queue_size = 128
+
+    def __init__(self, address, handler=RequestHandler, workers=16):
+        super().__init__(address, handler)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="watercheck-api")
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="WaterCheck HTTP JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--workers", type=int, default=16, help="concurrent requests handled at once")
+    parser.add_argument("--watch", type=float, default=WATCH_INTERVAL,
+                        help="seconds between checks for DB edits, 0 to disable (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    registry.watch(args.watch)
+    server = PooledHTTPServer((args.host, args.port), workers=args.workers)
+    print(f"Serving on http://{args.host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+"""Benchmarks for the analysis, PDF and proposal hot paths.
+
+Generates synthetic standards databases (from today's size up to
+thousands of parameters with many authorities), runs every stage against
+them and reports latency percentiles, throughput and peak memory.
+
+    python bench.py                         # full matrix, printed as a table
+    python bench.py --quick -o base.json    # save results
+    python bench.py -o new.json --compare base.json
+    python bench.py --imports               # cold-import times only
+
+With --compare the run exits non-zero if any stage's median latency
+regressed by more than --threshold (default 20%).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cache
+import compiled_db
+import engine
+import logic
+import report_pdf
+import result_store
+import sweep
+
+DB_SIZES = (15, 100, 1000, 10000)
+AUTHORITY_COUNTS = (2, 5)
+BATCH_SIZES = (1, 15, 100)
+SAMPLE_COUNTS = (10, 40, 160)
+QUICK = {"db_sizes": (15, 1000), "authorities": (2,), "batch_sizes": (15,), "sample_counts": (10, 40)}
+IMPORT_MODULES = ("logic", "cache", "theme", "engine", "api")
+
+PROPOSAL_INPUTS = [
+    {"name": "Bench City", "source": "River", "type": "City (Geometric)",
+     "pop_current": 250000, "growth_rate": 3.2, "design_period": 25},
+    {"name": "Bench Village", "source": "Borehole", "type": "Village (Arithmetic)",
+     "pop_current": 4000, "growth_rate": 2.5, "design_period": 15},
+]
+
+
+# --- SYNTHETIC DATA ---
+def synthetic_db(n_params, n_authorities, seed=0):
+    """Standards list shaped like database.json"""
+    rng = random.Random(seed)
+    authorities = [f"AUTH-{a:02d} {2000 + a}" for a in range(n_authorities)]
+    db = []
+    for p in range(n_params):
+        standards = []
+        for auth in authorities:
+            std = {"authority": auth,
+                   "consequence": f"Synthetic consequence text for parameter {p}.",
+                   "solution": f"Synthetic treatment recommendation for parameter {p}."}
+            kind = rng.random()
+            if kind < 0.2:
+                std["min_limit"] = round(rng.uniform(0, 5), 2)
+                std["max_limit"] = round(rng.uniform(5, 10), 2)
+            elif kind < 0.9:
+                std["max_limit"] = round(rng.uniform(0.001, 1000), 3)
+            standards.append(std)
+        db.append({"id": f"syn_{p:05d}", "name": f"Parameter {p:05d}", "unit": "mg/L", "standards": standards})
+    return db
+
+
+def synthetic_batch(db, size, seed=0):
+    rng = random.Random(seed)
+    return [{"name": item["name"], "value": round(rng.uniform(0, 1000), 3)}
+            for item in rng.sample(db, min(size, len(db)))]
+
+
+# --- MEASUREMENT ---
+def percentile(sorted_vals, q):
+    if not sorted_vals:
+        return 0.0
+    k = (len(sorted_vals) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+def measure(fn, min_time=0.5, max_repeat=1000, min_repeat=5):
+    """Time fn repeatedly, then run it once more under tracemalloc for peak memory"""
+    fn()  # warm-up
+    times = []
+    deadline = time.perf_counter() + min_time
+    while len(times) < max_repeat and (len(times) < min_repeat or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    times.sort()
+    return {
+        "n": len(times),
+        "mean_ms": statistics.fmean(times) * 1e3,
+        "p50_ms": percentile(times, 0.50) * 1e3,
+        "p95_ms": percentile(times, 0.95) * 1e3,
+        "p99_ms": percentile(times, 0.99) * 1e3,
+        "ops_per_s": len(times) / sum(times) if sum(times) else 0.0,
+        "peak_kib": peak / 1024,
+    }
+
+
+def import_time(module, repeat=7):
+    """Cold `import module` in fresh interpreters, timed by -X importtime (bytecode already cached)"""
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    cmd = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    here = os.path.dirname(os.path.abspath(__file__))
+    subprocess.run(cmd, cwd=here, env=env, capture_output=True, check=True)  # writes .pyc files
+    times = []
+    for _ in range(repeat):
+        err = subprocess.run(cmd, cwd=here, env=env, capture_output=True, text=True, check=True).stderr
+        # last line is the top-level module: "import time: self | cumulative | name"
+        times.append(int(err.strip().splitlines()[-1].split("|")[1]) / 1e6)
+    times.sort()
+    return {
+        "n": len(times),
+        "mean_ms": statistics.fmean(times) * 1e3,
+        "p50_ms": percentile(times, 0.50) * 1e3,
+        "p95_ms": percentile(times, 0.95) * 1e3,
+        "p99_ms": percentile(times, 0.99) * 1e3,
+        "ops_per_s": len(times) / sum(times),
+        "peak_kib": 0.0,
+    }
+
+
+# --- SUITE ---
+def run_suite(db_sizes=DB_SIZES, authorities=AUTHORITY_COUNTS, batch_sizes=BATCH_SIZES,
+              sample_counts=SAMPLE_COUNTS, min_time=0.5, log=sys.stderr, imports_only=False):
+    results = []
+
+    def record(stage, stats, **config):
+        row = {"stage": stage, **config, **stats}
+        results.append(row)
+        print(f"  {stage:<24} {config}  p50={stats['p50_ms']:.3f}ms  peak={stats['peak_kib']:.0f}KiB", file=log)
+
+    for module in IMPORT_MODULES:
+        record("import_cold", import_time(module), module=module)
+    if imports_only:
+        return results
+
+    saved_path = logic.registry.path
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            for n_params in db_sizes:
+                for n_auth in authorities:
+                    db = synthetic_db(n_params, n_auth)
+                    path = os.path.join(tmp, f"db_{n_params}_{n_auth}.json")
+                    with open(path, "w") as f:
+                        json.dump(db, f)
+                    logic.registry.path = path
+                    logic.registry.invalidate()
+                    cfg = {"db_params": n_params, "authorities": n_auth}
+
+                    first_batch = synthetic_batch(db, 15)
+
+                    def cold_load():
+                        logic.registry.invalidate()
+                        logic.load_data()
+
+                    def first_rerun():
+                        # what a fresh worker does before first paint of a report
+                        logic.registry.invalidate()
+                        logic.get_parameter_names()
+                        logic.analyze_batch(first_batch, mode="results")
+
+                    record("load_data_cold", measure(cold_load, min_time), **cfg)
+                    record("first_rerun_json", measure(first_rerun, min_time), **cfg)
+
+                    compiled_db.compile_db(path)
+                    record("load_compiled_cold",
+                           measure(lambda: (logic.registry.invalidate(), logic.registry.snapshot()), min_time), **cfg)
+                    record("first_rerun_compiled", measure(first_rerun, min_time), **cfg)
+                    os.remove(compiled_db.artifact_path(path))
+                    logic.registry.invalidate()
+
+                    record("load_data_warm", measure(logic.load_data, min_time), **cfg)
+
+                    for size in batch_sizes:
+                        batch = synthetic_batch(db, size)
+                        bcfg = dict(cfg, batch_size=len(batch))
+                        record("analyze_batch", measure(lambda: logic.analyze_batch(batch), min_time), **bcfg)
+                        record("analyze_batch_results",
+                               measure(lambda: logic.analyze_batch(batch, mode="results"), min_time), **bcfg)
+                        pdf_data = logic.analyze_batch(batch, mode="results")
+                        record("save_comprehensive_pdf",
+                               measure(lambda: logic.save_comprehensive_pdf(pdf_data, as_bytes=True), min_time), **bcfg)
+
+                    samples = [synthetic_batch(db, min(15, n_params), seed=s) for s in range(1000)]
+                    compiled = engine.compile_standards(logic.load_data())
+                    record("engine_1000_samples",
+                           measure(lambda: engine.evaluate_batches(samples, compiled), min_time), **cfg)
+        finally:
+            logic.registry.path = saved_path
+            logic.registry.invalidate()
+
+    for inputs in PROPOSAL_INPUTS:
+        record("generate_proposal", measure(lambda: logic.generate_proposal(inputs, as_bytes=True), min_time),
+               source=inputs["source"])
+
+    # 901 rates x 46 periods x 5 per-capita demands = 207,230 scenarios
+    axes = ([r / 100 for r in range(-100, 801)], list(range(5, 51)), [40, 60, 90, 120, 150])
+    grid = sweep.sweep(PROPOSAL_INPUTS[0], *axes)
+    record("proposal_sweep", measure(lambda: sweep.sweep(PROPOSAL_INPUTS[0], *axes), min_time), source="grid")
+    record("proposal_sweep_pdf", measure(lambda: sweep.sweep_pdf(grid, as_bytes=True), min_time), source="grid")
+
+    # what a restarted worker pays for a repeat report: memory cache empty, disk store warm
+    batch = synthetic_batch(logic.load_data(), 15)
+    saved_store = result_store.store
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            result_store.configure(tmp)
+            cache.cached_pdf(batch)
+            record("store_pdf_hit", measure(lambda: (cache._reports.clear(), cache.cached_pdf(batch)), min_time),
+                   batch_size=len(batch))
+        finally:
+            result_store.store = saved_store
+            cache._reports.clear()
+
+    # full panels: 100 parameters x 3 authorities per sample, so 300 table rows each;
+    # p50 per sample should stay flat as the count grows
+    db = synthetic_db(100, 3)
+    compiled = engine.compile_standards(db)
+    for n_samples in sample_counts:
+        evaluation = engine.evaluate_batches([synthetic_batch(db, 100, seed=s) for s in range(n_samples)], compiled)
+        samples = report_pdf.EvaluationSamples([f"S-{s:04d}" for s in range(n_samples)], evaluation)
+        record("samples_pdf", measure(lambda: report_pdf.save_samples_pdf(samples, as_bytes=True), min_time,
+                                      min_repeat=3), samples=n_samples)
+    return results
+
+
+# --- REPORTING ---
+CONFIG_KEYS = ("stage", "db_params", "authorities", "batch_size", "source", "module", "samples")
+
+
+def result_key(row):
+    return tuple(row.get(k) for k in CONFIG_KEYS)
+
+
+def compare(current, baseline, threshold):
+    """Rows whose median latency grew by more than threshold (a fraction)"""
+    base = {result_key(r): r for r in baseline}
+    regressions = []
+    for row in current:
+        old = base.get(result_key(row))
+        if old and old["p50_ms"] > 0 and row["p50_ms"] > old["p50_ms"] * (1 + threshold):
+            regressions.append((row, old))
+    return regressions
+
+
+def format_table(results):
+    lines = [f"{'stage':<24}{'db':>7}{'auth':>6}{'batch':>7}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}"
+             f"{'ops/s':>11}{'peak KiB':>11}"]
+    for r in results:
+        stage = f"{r['stage']}:{r['module']}" if "module" in r else r["stage"]
+        if "samples" in r:
+            stage = f"{r['stage']}:{r['samples']}"
+        lines.append(f"{stage:<24}{r.get('db_params', ''):>7}{r.get('authorities', ''):>6}"
+                     f"{r.get('batch_size', ''):>7}{r['p50_ms']:>11.3f}{r['p95_ms']:>11.3f}{r['p99_ms']:>11.3f}"
+                     f"{r['ops_per_s']:>11.1f}{r['peak_kib']:>11.0f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark WaterCheck hot paths.")
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.20, help="allowed p50 slowdown (default 0.20)")
+    parser.add_argument("--quick", action="store_true", help="small matrix for a fast check")
+    parser.add_argument("--imports", action="store_true", help="only time cold module imports")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds spent timing each case")
+    args = parser.parse_args(argv)
+
+    matrix = {"db_sizes": DB_SIZES, "authorities": AUTHORITY_COUNTS, "batch_sizes": BATCH_SIZES,
+              "sample_counts": SAMPLE_COUNTS}
+    if args.quick:
+        matrix = QUICK
+    results = run_suite(**matrix, min_time=args.min_time, imports_only=args.imports)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    print(format_table(results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for row, old in regressions:
+            print(f"REGRESSION {result_key(row)}: p50 {old['p50_ms']:.3f}ms -> {row['p50_ms']:.3f}ms",
+                  file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""Process-wide caches shared by every session, API request and worker thread.
+
+The standards index itself lives in logic.registry; this module holds
+the rendered outputs built from it: per-batch results and PDFs, and
+per-item results so the same routine reading entered in many sessions is
+evaluated once. Budgets come from WATERCHECK_CACHE_MB /
+WATERCHECK_CACHE_ENTRIES (reports) and can be changed with configure();
+cache_stats() reports sizes and hit/miss counters for monitoring.
+
+Report results, report PDFs and proposal PDFs are also kept in the
+on-disk result_store, so they survive a worker restart and are shared
+between processes. PDFs print the day they were rendered, so their
+keys include it and a PDF is never served on a later day.
+"""
+import datetime
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import result_store
+from logic import (analyze_batch, analyze_item, generate_proposal, plain_results, registry, rule_table,
+                   save_comprehensive_pdf)
+
+
+# --- LRU CACHE ---
+class LRUCache:
+    """Thread-safe LRU bounded by entry count and by an approximate byte budget"""
+
+    def __init__(self, max_entries=64, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()   # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return hit[0]
+
+    def put(self, key, value, size=0):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if size > self.max_bytes:
+                return  # never cache something larger than the whole budget
+            self._data[key] = (value, size)
+            self._bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, evicted) = self._data.popitem(last=False)
+            self._bytes -= evicted
+            self.evictions += 1
+
+    def resize(self, max_entries=None, max_bytes=None):
+        """Change the budgets, evicting least recently used entries to fit"""
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"entries": len(self._data), "bytes": self._bytes,
+                    "max_entries": self.max_entries, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "hit_rate": round(self.hits / lookups, 4) if lookups else None}
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+
+# --- REPORT MEMOIZATION ---
+_reports = LRUCache(max_entries=int(os.environ.get("WATERCHECK_CACHE_ENTRIES", 64)),
+                    max_bytes=int(float(os.environ.get("WATERCHECK_CACHE_MB", 32)) * 1024 * 1024))
+_items = LRUCache(max_entries=8192, max_bytes=8 * 1024 * 1024)
+
+
+def configure(max_entries=None, max_mb=None):
+    """Resize the shared report cache at runtime"""
+    _reports.resize(max_entries, None if max_mb is None else int(max_mb * 1024 * 1024))
+
+
+def cache_stats():
+    """Sizes and hit/miss counters of every shared cache, for monitoring"""
+    store = result_store.store
+    return {"standards": registry.stats(), "reports": _reports.stats(), "items": _items.stats(),
+            "store": store.stats() if store else None}
+
+
+def batch_key(batch_data, db_version, authorities=None):
+    """Canonical hash of a batch (order and value types matter), the DB version and authority selection"""
+    payload = json.dumps([[item['name'], item['value']] for item in batch_data], separators=(",", ":"))
+    selection = "*" if not authorities else json.dumps(sorted(set(authorities)))
+    return hashlib.sha256(f"{db_version}\n{selection}\n{payload}".encode()).hexdigest()
+
+
+def _approx_size(pdf_data):
+    size = 0
+    for res in pdf_data:
+        size += 200 + len(res['parameter']) + len(res['value'])
+        size += 72 * len(res['standards'])   # StandardResult: text stays in the registry
+    return size
+
+
+def _entry(batch_data, authorities):
+    key = batch_key(batch_data, registry.snapshot().version, authorities)
+    entry = _reports.get(key)
+    if entry is None:
+        store = result_store.store
+        pdf_data = store.get_json(key) if store else None   # plain dicts, same keys as StandardResult
+        if pdf_data is None:
+            pdf_data = analyze_batch(batch_data, mode="results", authorities=authorities)
+            if store:
+                store.put_json(key, plain_results(pdf_data))
+        entry = {"pdf_data": pdf_data, "pdf_bytes": None, "pdf_date": None}
+        _reports.put(key, entry, _approx_size(pdf_data))
+    return key, entry
+
+
+def cached_analysis(batch_data, authorities=None):
+    """Structured results for a batch, computed once per batch, selection and DB version.
+
+    The returned list is shared between callers and must not be mutated.
+    """
+    return _entry(batch_data, authorities)[1]["pdf_data"]
+
+
+def cached_pdf(batch_data, authorities=None):
+    """PDF bytes for a batch; FPDF only runs the first time they are asked for on a given day"""
+    key, entry = _entry(batch_data, authorities)
+    today = datetime.date.today().isoformat()
+    if entry["pdf_bytes"] is None or entry["pdf_date"] != today:
+        pdf_key = result_store.content_key("report", key, today)
+        store = result_store.store
+        pdf_bytes = store.get(pdf_key, "pdf") if store else None
+        if pdf_bytes is None:
+            pdf_bytes = save_comprehensive_pdf(entry["pdf_data"], as_bytes=True)
+            if store:
+                store.put(pdf_key, "pdf", pdf_bytes)
+        entry["pdf_bytes"] = pdf_bytes
+        entry["pdf_date"] = today
+        _reports.put(key, entry, len(entry["pdf_bytes"]) + _approx_size(entry["pdf_data"]))
+    return entry["pdf_bytes"]
+
+
+def item_context(name, values, authorities=None):
+    """(parameter, value) pairs of the sample that the rules of name read; () for plain limits"""
+    return tuple((other, values.get(other)) for other in rule_table(authorities).inputs(name))
+
+
+def cached_item(name, value, authorities=None, context=()):
+    """analyze_item() result shared across sessions (None for an unknown parameter).
+
+    context comes from item_context(), so an item whose rules read other
+    parameters is evaluated again when one of those changes.
+    """
+    selection = None if not authorities else tuple(sorted(set(authorities)))
+    key = (registry.snapshot().version, selection, name, type(value).__name__, value, context)   # 9 and 9.0 display differently
+    hit = _items.get(key, _items)
+    if hit is _items:
+        hit = analyze_item(name, value, authorities, dict(context))
+        _items.put(key, hit, 0 if hit is None else 200 + 72 * len(hit['standards']))
+    return hit
+
+
+PROPOSAL_FIELDS = ("name", "source", "type", "pop_current", "growth_rate", "design_period")
+
+
+def cached_proposal(inputs):
+    """generate_proposal() PDF bytes, rendered once per distinct set of inputs and day.
+
+    The proposal does not read the standards DB, so its key is the inputs
+    and the date it prints.
+    """
+    key = result_store.content_key("proposal", [inputs[f] for f in PROPOSAL_FIELDS],
+                                   datetime.date.today().isoformat())
+    pdf_bytes = _reports.get(key)
+    if pdf_bytes is None:
+        store = result_store.store
+        pdf_bytes = store.get(key, "pdf") if store else None
+        if pdf_bytes is None:
+            pdf_bytes = generate_proposal(inputs, as_bytes=True)
+            if store:
+                store.put(key, "pdf", pdf_bytes)
+        _reports.put(key, pdf_bytes, len(pdf_bytes))
+    return pdf_bytes
@@ -0,0 +1,166 @@
+"""Headless bulk analysis of lab results.
+
+Reads a CSV or JSONL export with one measurement per row
+(sample_id, parameter, value), evaluates each sample against the
+standards DB and writes one result per sample as it goes.
+
+Rows of a sample must be contiguous (sort the export by sample_id);
+only the current chunk of samples is ever held in memory.
+
+    python cli.py results.csv -o report.jsonl
+    python cli.py export.jsonl -o report.csv --db database.json
+"""
+import argparse
+import csv
+import json
+import math
+import sys
+
+import engine
+from logic import DB_FILE, StandardsRegistry, plain_results
+
+CSV_FIELDS = ["sample_id", "parameter", "value", "unit", "authority", "status", "limit", "violation"]
+
+
+# --- INPUT ---
+def read_rows(stream, fmt, sample_col="sample_id", param_col="parameter", value_col="value"):
+    """Yield (sample_id, parameter, raw_value) tuples from a CSV or JSONL stream"""
+    if fmt == "jsonl":
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            yield str(row[sample_col]), row[param_col], row[value_col]
+    else:
+        for row in csv.DictReader(stream):
+            yield row[sample_col], row[param_col], row[value_col]
+
+
+def group_samples(rows, stats):
+    """Group consecutive rows into (sample_id, batch_list) pairs"""
+    current_id = None
+    batch = []
+    for sample_id, param, raw in rows:
+        stats["rows"] += 1
+        try:
+            value = float(raw)
+        except (TypeError, ValueError):
+            value = math.nan
+        if not math.isfinite(value):   # "nan"/"inf" are not readings either
+            stats["skipped"] += 1
+            continue
+        if sample_id != current_id:
+            if batch:
+                yield current_id, batch
+            current_id, batch = sample_id, []
+        batch.append({"name": param, "value": value})
+    if batch:
+        yield current_id, batch
+
+
+def chunked(samples, size):
+    chunk = []
+    for sample in samples:
+        chunk.append(sample)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# --- OUTPUT ---
+class JsonlWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, sample_id, summary, results):
+        record = {"sample_id": sample_id, **summary, "results": plain_results(results, display=False)}
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class CsvWriter:
+    def __init__(self, stream):
+        self.writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write(self, sample_id, summary, results):
+        for res in results:
+            value, _, unit = res["value"].partition(" ")
+            for std in res["standards"]:
+                self.writer.writerow({
+                    "sample_id": sample_id,
+                    "parameter": res["parameter"],
+                    "value": value,
+                    "unit": unit,
+                    "authority": std["authority"],
+                    "status": std["status"],
+                    "limit": std["limit"],
+                    "violation": std.get("violation", ""),
+                })
+
+
+def detect_format(path, explicit):
+    if explicit:
+        return explicit
+    return "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+# --- ENTRY POINT ---
+def run(in_stream, out_stream, in_fmt="csv", out_fmt="jsonl", db_path=DB_FILE, chunk_size=1000,
+        authorities=None):
+    """Stream-evaluate in_stream into out_stream; returns row/sample counters"""
+    snap = StandardsRegistry(db_path).snapshot()
+    compiled = engine.compile_standards(snap.data, snap.version)
+    compiled = compiled.subset(authorities)   # ValueError on unknown authorities
+    writer = JsonlWriter(out_stream) if out_fmt == "jsonl" else CsvWriter(out_stream)
+    stats = {"rows": 0, "skipped": 0, "samples": 0, "unsafe_samples": 0}
+
+    samples = group_samples(read_rows(in_stream, in_fmt), stats)
+    for chunk in chunked(samples, chunk_size):
+        ev = engine.evaluate_batches([batch for _, batch in chunk], compiled)
+        for i, (sample_id, _) in enumerate(chunk):
+            summary = ev.summary(i)
+            writer.write(sample_id, summary, ev.results(i))
+            stats["samples"] += 1
+            if summary["unsafe"]:
+                stats["unsafe_samples"] += 1
+        out_stream.flush()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk water quality analysis of lab results.")
+    parser.add_argument("input", help="CSV or JSONL file with sample_id, parameter, value ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="results file, .jsonl or .csv ('-' for stdout)")
+    parser.add_argument("--input-format", choices=["csv", "jsonl"])
+    parser.add_argument("--output-format", choices=["csv", "jsonl"])
+    parser.add_argument("--db", default=DB_FILE, help="standards database (default: %(default)s)")
+    parser.add_argument("--chunk", type=int, default=1000, help="samples evaluated per vectorized pass")
+    parser.add_argument("--authority", action="append", dest="authorities",
+                        help="only check this authority's limits (repeatable; default: all)")
+    args = parser.parse_args(argv)
+
+    in_fmt = detect_format(args.input, args.input_format)
+    out_fmt = args.output_format or ("csv" if args.output.endswith(".csv") else "jsonl")
+
+    in_stream = sys.stdin if args.input == "-" else open(args.input, "r", newline="", encoding="utf-8")
+    out_stream = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        stats = run(in_stream, out_stream, in_fmt, out_fmt, args.db, max(1, args.chunk), args.authorities)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        if in_stream is not sys.stdin:
+            in_stream.close()
+        if out_stream is not sys.stdout:
+            out_stream.close()
+
+    print(f"{stats['samples']} samples ({stats['unsafe_samples']} flagged) from {stats['rows']} rows, "
+          f"{stats['skipped']} non-numeric or non-finite rows skipped", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
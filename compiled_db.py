@@ -0,0 +1,322 @@
+"""Compiled binary form of database.json.
+
+    python compiled_db.py [database.json] [-o database.wcdb]
+
+The artifact packs the numeric limits into float64 arrays, stores every
+distinct string once in a shared table and keeps the name-sorted order
+precomputed. Loading it is one read() plus a few memoryview casts; the
+per-parameter dicts are only rebuilt when something asks for them, so
+startup cost stays flat as the catalog grows. logic.StandardsRegistry
+uses it automatically when it is newer than the JSON.
+
+Layout (little-endian, sections 8-byte aligned):
+    header        magic, format version, source content hash, counts
+    str_offsets   uint32[n_strings + 1]
+    str_blob      utf-8 bytes
+    param_cols    uint32[n_params, 4]      name, id, unit, extra-json
+    param_offsets uint32[n_params + 1]     standard rows of each parameter
+    sorted_order  uint32[n_params]         parameters ordered by name
+    sorted_names  utf-8, NUL-separated     their names, decoded in one call
+    std_cols      uint32[n_standards, 4]   authority, consequence, solution, extra-json
+    std_flags     uint8[n_standards, 2]    min/max: absent, null, float or int
+    min_limit     float64[n_standards]     NaN when absent or null
+    max_limit     float64[n_standards]
+"""
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+from collections.abc import Mapping
+
+MAGIC = b"WCDB"
+FORMAT_VERSION = 1
+NONE = 0xFFFFFFFF
+ABSENT, NULL, FLOAT, INT = 0, 1, 2, 3
+
+_HEADER = struct.Struct("<4sI16sIIIII")
+PARAM_FIELDS = ("name", "id", "unit")
+STD_FIELDS = ("authority", "consequence", "solution")
+LIMIT_FIELDS = ("min_limit", "max_limit")
+
+
+def artifact_path(json_path):
+    return os.path.splitext(json_path)[0] + ".wcdb"
+
+
+def content_version(raw):
+    """Version string of a DB file's bytes; matches StandardsRegistry's"""
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def _pad(n):
+    return (-n) % 8
+
+
+# --- BUILD ---
+class _StringTable:
+    def __init__(self):
+        self.index = {}
+        self.items = []
+
+    def add(self, s):
+        i = self.index.get(s)
+        if i is None:
+            i = self.index[s] = len(self.items)
+            self.items.append(s)
+        return i
+
+
+def _text_cols(obj, fields, packed, strings):
+    """Interned indexes for the text fields, plus whatever else obj holds as JSON"""
+    cols = []
+    for field in fields:
+        value = obj.get(field)
+        cols.append(strings.add(value) if isinstance(value, str) else NONE)
+    extra = {k: v for k, v in obj.items()
+             if k not in packed and not (k in fields and isinstance(v, str))}
+    cols.append(strings.add(json.dumps(extra, ensure_ascii=False)) if extra else NONE)
+    return cols
+
+
+def _limit(std, field):
+    if field not in std:
+        return ABSENT, float("nan")
+    value = std[field]
+    if value is None:
+        return NULL, float("nan")
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"non-numeric {field} {value!r} for {std.get('authority')}")
+    return (INT if isinstance(value, int) else FLOAT), float(value)
+
+
+def compile_data(data, version):
+    """Serialize a standards list into the binary layout"""
+    if sys.byteorder != "little":
+        raise ValueError("compiled standards require a little-endian host")
+    strings = _StringTable()
+    param_cols, param_offsets = [], [0]
+    std_cols, std_flags, mins, maxs = [], [], [], []
+
+    for item in data:
+        param_cols.extend(_text_cols(item, PARAM_FIELDS, ("standards",), strings))
+        for std in item.get("standards", []):
+            std_cols.extend(_text_cols(std, STD_FIELDS, LIMIT_FIELDS, strings))
+            lo_flag, lo = _limit(std, "min_limit")
+            hi_flag, hi = _limit(std, "max_limit")
+            std_flags.extend((lo_flag, hi_flag))
+            mins.append(lo)
+            maxs.append(hi)
+        param_offsets.append(len(mins))
+
+    n_params = len(data)
+    sorted_order = sorted(range(n_params), key=lambda p: strings.items[param_cols[4 * p]])
+
+    blob = bytearray()
+    str_offsets = [0]
+    for s in strings.items:
+        blob += s.encode("utf-8")
+        str_offsets.append(len(blob))
+
+    names_blob = "\0".join(strings.items[param_cols[4 * p]] for p in sorted_order).encode("utf-8")
+
+    out = bytearray(_HEADER.pack(MAGIC, FORMAT_VERSION, version.encode("ascii")[:16].ljust(16),
+                                 len(strings.items), n_params, len(mins), len(blob), len(names_blob)))
+    out += b"\0" * _pad(len(out))
+    for fmt, values in (("I", str_offsets), (None, blob), ("I", param_cols), ("I", param_offsets),
+                        ("I", sorted_order), (None, names_blob), ("I", std_cols), ("B", std_flags),
+                        ("d", mins), ("d", maxs)):
+        out += bytes(values) if fmt is None else struct.pack(f"<{len(values)}{fmt}", *values)
+        out += b"\0" * _pad(len(out))
+    return bytes(out)
+
+
+def compile_db(json_path="database.json", out_path=None):
+    """Compile json_path next to itself (or to out_path); returns the artifact path.
+
+    Raises ValueError if the JSON is not a valid standards DB, since the
+    registry loads the artifact without validating it again.
+    """
+    from logic import validate_standards   # logic imports this module
+    out_path = out_path or artifact_path(json_path)
+    with open(json_path, "rb") as f:
+        raw = f.read()
+    data = json.loads(raw)
+    validate_standards(data)
+    payload = compile_data(data, content_version(raw))
+    tmp = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(payload)
+    os.replace(tmp, out_path)
+    return out_path
+
+
+# --- LOAD ---
+class StandardsTable:
+    """Read-only view over a compiled artifact"""
+
+    def __init__(self, buf):
+        if len(buf) < _HEADER.size:
+            raise ValueError("truncated standards artifact")
+        magic, fmt, version, n_strings, n_params, n_standards, blob_len, names_len = _HEADER.unpack_from(buf)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError("not a compiled standards artifact (or unsupported format version)")
+        if sys.byteorder != "little":
+            raise ValueError("compiled standards require a little-endian host")
+
+        self.version = version.rstrip(b"\0 ").decode("ascii")
+        self.n_params = n_params
+        self.n_standards = n_standards
+        self._buf = buf
+        mv = memoryview(buf)
+        pos = _HEADER.size + _pad(_HEADER.size)
+
+        def take(nbytes, fmt):
+            nonlocal pos
+            if pos + nbytes > len(buf):
+                raise ValueError("truncated standards artifact")
+            view = mv[pos:pos + nbytes]
+            pos += nbytes + _pad(nbytes)
+            return view if fmt is None else view.cast(fmt)
+
+        self._str_offsets = take(4 * (n_strings + 1), "I")
+        self._blob = bytes(take(blob_len, None))
+        self.param_cols = take(16 * n_params, "I")
+        self.param_offsets = take(4 * (n_params + 1), "I")
+        self.sorted_order = take(4 * n_params, "I")
+        self._names_blob = take(names_len, None)
+        self.std_cols = take(16 * n_standards, "I")
+        self.std_flags = take(2 * n_standards, "B")
+        self.min_limit = take(8 * n_standards, "d")
+        self.max_limit = take(8 * n_standards, "d")
+
+        self._strings = {}
+        self._params = {}
+        self._name_index = None
+        self._id_index = None
+        self._sorted_names = None
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def string(self, i):
+        if i == NONE:
+            return None
+        s = self._strings.get(i)
+        if s is None:
+            offsets = self._str_offsets
+            s = self._strings[i] = self._blob[offsets[i]:offsets[i + 1]].decode("utf-8")
+        return s
+
+    def param_name(self, p):
+        return self.string(self.param_cols[4 * p])
+
+    @property
+    def sorted_names(self):
+        if self._sorted_names is None:
+            names = str(self._names_blob, "utf-8").split("\0") if self.n_params else []
+            if len(names) != self.n_params:  # a name contained NUL; decode one by one
+                names = [self.param_name(p) for p in self.sorted_order]
+            self._sorted_names = tuple(names)
+        return self._sorted_names
+
+    @property
+    def name_index(self):
+        if self._name_index is None:
+            index = {}
+            # sorted_order is stable, so walking it backwards lets the first entry win
+            for name, p in zip(reversed(self.sorted_names), reversed(self.sorted_order)):
+                index[name] = p
+            self._name_index = index
+        return self._name_index
+
+    @property
+    def id_index(self):
+        if self._id_index is None:
+            index = {}
+            for p in range(self.n_params):
+                pid = self.string(self.param_cols[4 * p + 1])
+                if pid is not None:
+                    index.setdefault(pid, p)
+            self._id_index = index
+        return self._id_index
+
+    def _limit_value(self, s, which):
+        flag = self.std_flags[2 * s + which]
+        if flag == ABSENT:
+            return ABSENT, None
+        if flag == NULL:
+            return NULL, None
+        value = (self.min_limit, self.max_limit)[which][s]
+        return flag, int(value) if flag == INT else value
+
+    def standard(self, s):
+        """Rebuild standard row s as the dict database.json holds"""
+        cols = self.std_cols[4 * s:4 * s + 4]
+        std = {}
+        for field, i in zip(STD_FIELDS, cols):
+            if i != NONE:
+                std[field] = self.string(i)
+        for which, field in enumerate(LIMIT_FIELDS):
+            flag, value = self._limit_value(s, which)
+            if flag != ABSENT:
+                std[field] = value
+        if cols[3] != NONE:
+            std.update(json.loads(self.string(cols[3])))
+        return std
+
+    def param(self, p):
+        """Rebuild parameter p (cached; shared, do not mutate)"""
+        item = self._params.get(p)
+        if item is None:
+            cols = self.param_cols[4 * p:4 * p + 4]
+            item = {field: self.string(i) for field, i in zip(PARAM_FIELDS, cols) if i != NONE}
+            item["standards"] = [self.standard(s) for s in range(self.param_offsets[p], self.param_offsets[p + 1])]
+            if cols[3] != NONE:
+                item.update(json.loads(self.string(cols[3])))
+            self._params[p] = item
+        return item
+
+    def to_list(self):
+        return [self.param(p) for p in range(self.n_params)]
+
+
+class LazyIndex(Mapping):
+    """Read-only key -> parameter dict mapping that rebuilds entries on first access"""
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key):
+        return self._table.param(self._index[key])
+
+    def get(self, key, default=None):
+        p = self._index.get(key)
+        return default if p is None else self._table.param(p)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile database.json into the binary standards format.")
+    parser.add_argument("json_path", nargs="?", default="database.json")
+    parser.add_argument("-o", "--output", help="artifact path (default: next to the JSON, .wcdb)")
+    args = parser.parse_args(argv)
+    out = compile_db(args.json_path, args.output)
+    print(f"wrote {out} ({os.path.getsize(out)} bytes)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
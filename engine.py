@@ -0,0 +1,414 @@
+import numpy as np
+
+from compiled_db import NONE
+from logic import STATUS_CODES, StandardResult, registry
+from rules import AnyOf, compile_rule, is_plain
+
+# Status codes returned by evaluate_matrix(); the same codes StandardResult stores
+NOT_MEASURED = -1
+PASS = STATUS_CODES["PASS"]
+FAIL = STATUS_CODES["FAIL"]
+INFO = STATUS_CODES["INFO"]
+
+
+# --- COMPILED STANDARDS ---
+class CompiledStandards:
+    """Columnar copy of the standards DB.
+
+    Every (parameter, standard) pair becomes one row. Rows of the same
+    parameter are contiguous, and offsets[i]:offsets[i + 1] is the slice
+    belonging to parameter i. Missing limits are stored as NaN. Rows whose
+    standard is a conditional, ratio or either/or rule (see rules.py) are
+    listed in rules and evaluated column by column after the limit pass.
+    """
+
+    def __init__(self, data, version=None):
+        self.version = version   # standards DB version, recorded on every result
+        self.param_names = []
+        self.param_index = {}
+        self.units = []
+        self.standards = []      # original std dicts, for text fields
+        self.authority_codes = {}
+        self.rules = {}          # row -> compiled rules.Rule, for non-plain standards only
+        std_param = []
+        std_authority = []
+        min_limit = []
+        max_limit = []
+        offsets = [0]
+
+        for item in data:
+            # first entry wins, same as the registry's name index
+            if item["name"] in self.param_index:
+                continue
+            idx = len(self.param_names)
+            self.param_index[item["name"]] = idx
+            self.param_names.append(item["name"])
+            self.units.append(item["unit"])
+            for std in item["standards"]:
+                if not is_plain(std):
+                    self.rules[len(self.standards)] = compile_rule(std)
+                self.standards.append(std)
+                std_param.append(idx)
+                std_authority.append(self.authority_codes.setdefault(std["authority"], len(self.authority_codes)))
+                lo = std.get("min_limit")
+                hi = std.get("max_limit")
+                min_limit.append(np.nan if lo is None else lo)
+                max_limit.append(np.nan if hi is None else hi)
+            offsets.append(len(self.standards))
+
+        self.std_param = np.asarray(std_param, dtype=np.intp)
+        self.std_authority = np.asarray(std_authority, dtype=np.intp)
+        self.min_limit = np.asarray(min_limit, dtype=np.float64)
+        self.max_limit = np.asarray(max_limit, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.intp)
+        self.no_limit = np.isnan(self.min_limit) & np.isnan(self.max_limit)
+        self._subsets = {}
+
+    @classmethod
+    def from_table(cls, table):
+        """Zero-parse build from a compiled artifact (compiled_db.StandardsTable)"""
+        self = cls.__new__(cls)
+        self.version = table.version
+        self.param_names = [table.param_name(p) for p in range(table.n_params)]
+        self.param_index = {name: p for p, name in enumerate(self.param_names)}
+        self.units = [table.string(table.param_cols[4 * p + 2]) for p in range(table.n_params)]
+        self.standards = _TableStandards(table)
+        offsets = np.frombuffer(table.param_offsets, dtype=np.uint32).astype(np.intp)
+        self.offsets = offsets
+        self.std_param = np.repeat(np.arange(table.n_params, dtype=np.intp), np.diff(offsets))
+        self.min_limit = np.frombuffer(table.min_limit, dtype=np.float64)
+        self.max_limit = np.frombuffer(table.max_limit, dtype=np.float64)
+        self.no_limit = np.isnan(self.min_limit) & np.isnan(self.max_limit)
+        # interned string ids double as authority codes
+        self.std_authority = np.frombuffer(table.std_cols, dtype=np.uint32).reshape(-1, 4)[:, 0].astype(np.intp)
+        self.authority_codes = {table.string(int(i)): int(i) for i in np.unique(self.std_authority)}
+        # rules live in the extra-JSON column, so only rows that have one need rebuilding
+        extra = np.frombuffer(table.std_cols, dtype=np.uint32).reshape(-1, 4)[:, 3]
+        self.rules = {}
+        for s in np.flatnonzero(extra != NONE).tolist():
+            std = self.standards[s]
+            if not is_plain(std):
+                self.rules[s] = compile_rule(std)
+        self._subsets = {}
+        return self
+
+    def subset(self, authorities):
+        """Limit table restricted to the given authorities (built once per selection)
+
+        An empty selection means every authority, as in analyze_batch();
+        names not in the table raise ValueError.
+        """
+        if not authorities:
+            return self
+        key = frozenset(authorities)
+        sub = self._subsets.get(key)
+        if sub is None:
+            unknown = key.difference(self.authority_codes)
+            if unknown:
+                raise ValueError(f"unknown authorities: {', '.join(sorted(unknown))}")
+            codes = [self.authority_codes[a] for a in key]
+            rows = np.flatnonzero(np.isin(self.std_authority, codes))
+            sub = CompiledStandards.__new__(CompiledStandards)
+            sub.version = self.version
+            sub.param_names = self.param_names
+            sub.param_index = self.param_index
+            sub.units = self.units
+            sub.authority_codes = self.authority_codes
+            sub.standards = [self.standards[i] for i in rows]
+            sub.std_param = self.std_param[rows]
+            sub.std_authority = self.std_authority[rows]
+            sub.min_limit = self.min_limit[rows]
+            sub.max_limit = self.max_limit[rows]
+            sub.no_limit = self.no_limit[rows]
+            sub.rules = {}
+            for s, rule in self.rules.items():
+                pos = int(np.searchsorted(rows, s))
+                if pos < len(rows) and rows[pos] == s:
+                    sub.rules[pos] = rule
+            counts = np.bincount(sub.std_param, minlength=self.n_params)
+            sub.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.intp)
+            sub._subsets = {}
+            self._subsets[key] = sub
+        return sub
+
+    @property
+    def n_params(self):
+        return len(self.param_names)
+
+    @property
+    def n_standards(self):
+        return len(self.standards)
+
+
+class _TableStandards:
+    """Standard dicts of a compiled artifact, rebuilt on first access"""
+
+    def __init__(self, table):
+        self._table = table
+        self._cache = {}
+
+    def __getitem__(self, s):
+        std = self._cache.get(s)
+        if std is None:
+            std = self._cache[s] = self._table.standard(s)
+        return std
+
+    def __len__(self):
+        return self._table.n_standards
+
+
+def compile_standards(data=None, version=None):
+    """Compile a standards list, or the registry's current DB (cached per DB version)"""
+    if data is not None:
+        return CompiledStandards(data, version)
+    snap = registry.snapshot()
+    compiled = snap.derived.get("engine")
+    if compiled is None:
+        table = snap.table
+        if table is not None and len(table.name_index) == table.n_params:
+            compiled = CompiledStandards.from_table(table)
+        else:
+            compiled = CompiledStandards(snap.data, snap.version)
+        snap.derived["engine"] = compiled
+    return compiled
+
+
+# --- EVALUATION ---
+class MatrixEvaluation:
+    """Result of one vectorized pass over a (samples x parameters) matrix"""
+
+    def __init__(self, compiled, values, codes, below, param_fail, batches=None):
+        self.compiled = compiled
+        self.values = values            # (samples, params), NaN = not measured
+        self.codes = codes              # (samples, standards), int8 status codes
+        self.below = below              # (samples, standards), True where value < min
+        self.param_fail = param_fail    # (samples, params), any standard failed
+        self.batches = batches
+        self.replicates = {}            # (sample, item position) -> row, see evaluate_batches()
+
+        measured = ~np.isnan(values)
+        self.total = measured.sum(axis=1)
+        self.unsafe = param_fail.sum(axis=1)
+        self.safe = self.total - self.unsafe
+
+    def count_items(self, cells):
+        """Count per batch item, as analyze_batch() does, replicate readings included.
+
+        cells holds (sample, row, param) index arrays, one entry per known item.
+        """
+        sample, rows, params = cells
+        n = len(self.batches)
+        self.total = np.bincount(sample, minlength=n)
+        self.unsafe = np.bincount(sample, weights=self.param_fail[rows, params], minlength=n).astype(np.intp)
+        self.safe = self.total - self.unsafe
+
+    def summary(self, i):
+        return {"total": int(self.total[i]), "safe": int(self.safe[i]), "unsafe": int(self.unsafe[i])}
+
+    def results(self, i):
+        """Per-parameter results of sample i in the analyze_batch() dict shape"""
+        c = self.compiled
+        if self.batches is not None:
+            replicates = self.replicates
+            items = [(x["name"], x["value"], replicates.get((i, k), i)) for k, x in enumerate(self.batches[i])]
+        else:
+            values = self.values[i]
+            items = [(name, values[p], i) for p, name in enumerate(c.param_names) if not np.isnan(values[p])]
+
+        pdf_results = []
+        for name, val, row in items:
+            p = c.param_index.get(name)
+            if p is None:
+                continue
+            entry = {"parameter": name, "value": f"{val} {c.units[p]}", "standards": [], "db_version": c.version}
+            for s in range(c.offsets[p], c.offsets[p + 1]):
+                code = int(self.codes[row, s])
+                if code == NOT_MEASURED:
+                    continue    # conditional standard that does not apply to this sample
+                std = c.standards[s]
+                rule = c.rules.get(s)
+                violation_txt = ""
+                if code == FAIL:
+                    if rule is not None:
+                        violation_txt = rule.violation_text(bool(self.below[row, s]))
+                    elif self.below[row, s]:
+                        violation_txt = f"< {std.get('min_limit')}"
+                    else:
+                        violation_txt = f"> {std.get('max_limit')}"
+                entry["standards"].append(StandardResult(std, code, violation_txt, None if rule is None else rule.label))
+            pdf_results.append(entry)
+        return pdf_results
+
+
+def _operand_column(operand, own, column):
+    if operand is None:
+        return own
+    x = own if operand.parameter is None else column(operand.parameter)
+    if operand.ratio_to is None:
+        return x
+    d = column(operand.ratio_to)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(d != 0, x / d, np.nan)
+
+
+def _check_codes(check, own, column):
+    """(codes, below) of a rules.Check or AnyOf for every sample"""
+    if isinstance(check, AnyOf):
+        passed = np.zeros(own.shape, dtype=bool)
+        failed = np.zeros(own.shape, dtype=bool)
+        for part in check.checks:
+            codes, _ = _check_codes(part, own, column)
+            passed |= codes == PASS
+            failed |= codes == FAIL
+        return np.where(passed, PASS, np.where(failed, FAIL, INFO)), np.zeros(own.shape, dtype=bool)
+    below = np.zeros(own.shape, dtype=bool)
+    if check.lo is None and check.hi is None:
+        return np.full(own.shape, INFO), below
+    x = _operand_column(check.operand, own, column)
+    above = np.zeros(own.shape, dtype=bool)
+    with np.errstate(invalid="ignore"):
+        if check.lo is not None:
+            below = x < check.lo
+        if check.hi is not None:
+            above = x > check.hi
+    return np.where(np.isnan(x), INFO, np.where(below | above, FAIL, PASS)), below
+
+
+def _rule_codes(rule, own, column):
+    """Vectorized rules.Rule.evaluate(): NOT_MEASURED where a condition does not hold"""
+    codes, below = _check_codes(rule.check, own, column)
+    # walk the conditions backwards so the first one decides, as in the scalar loop
+    for cond in reversed(rule.conditions):
+        x = _operand_column(cond.operand, own, column)
+        holds = np.ones(own.shape, dtype=bool)
+        with np.errstate(invalid="ignore"):
+            if cond.lo is not None:
+                holds &= x >= cond.lo
+            if cond.hi is not None:
+                holds &= x < cond.hi
+        codes = np.where(np.isnan(x), INFO, np.where(holds, codes, NOT_MEASURED))
+    return codes, below
+
+
+def evaluate_matrix(values, compiled=None, authorities=None):
+    """Evaluate a (samples x parameters) array against every standard in one pass.
+
+    Columns follow compiled.param_names; NaN marks a parameter that was not
+    measured for that sample. authorities restricts the pass to those
+    authorities' standards.
+    """
+    if compiled is None:
+        compiled = compile_standards()
+    compiled = compiled.subset(authorities)
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim != 2 or values.shape[1] != compiled.n_params:
+        raise ValueError(f"expected a (samples, {compiled.n_params}) matrix, got {values.shape}")
+
+    vals = values[:, compiled.std_param]
+    with np.errstate(invalid="ignore"):
+        below = vals < compiled.min_limit
+        above = vals > compiled.max_limit
+    failed = below | above
+
+    codes = np.where(failed, FAIL, np.where(compiled.no_limit, INFO, PASS)).astype(np.int8)
+    codes[np.isnan(vals)] = NOT_MEASURED
+
+    def column(name):
+        p = compiled.param_index.get(name)
+        return np.full(values.shape[0], np.nan) if p is None else values[:, p]
+
+    for s, rule in compiled.rules.items():
+        own = vals[:, s]
+        rule_codes, rule_below = _rule_codes(rule, own, column)
+        codes[:, s] = np.where(np.isnan(own), NOT_MEASURED, rule_codes)
+        below[:, s] = rule_below
+        failed[:, s] = codes[:, s] == FAIL
+
+    n_samples = values.shape[0]
+    param_fail = np.zeros((n_samples, compiled.n_params), dtype=bool)
+    counts = np.diff(compiled.offsets)
+    has_std = counts > 0
+    if has_std.any() and n_samples:
+        # offsets of non-empty parameters delimit contiguous standard rows
+        starts = compiled.offsets[:-1][has_std]
+        param_fail[:, has_std] = np.logical_or.reduceat(failed, starts, axis=1)
+
+    return MatrixEvaluation(compiled, values, codes, below, param_fail)
+
+
+def _pack_batches(batches, compiled):
+    """(values, replicates, cells) for evaluate_batches(); the first rows are batches_to_matrix().
+
+    A parameter read more than once in a sample (replicate rows in a lab
+    export) is evaluated once per reading, as analyze_batch() does: the
+    sample's row holds the last reading, and every earlier one gets an
+    extra row after the samples, a copy of its sample's row with that
+    reading in place. Cross-parameter rules therefore always see the last
+    reading of the other parameters.
+    """
+    index = compiled.param_index
+    n = len(batches)
+    params = []
+    vals = []
+    counts = []
+    replicated = []
+    for i, batch in enumerate(batches):
+        start = len(params)
+        for item in batch:
+            p = index.get(item["name"])
+            if p is not None:
+                params.append(p)
+                vals.append(item["value"])
+        count = len(params) - start
+        counts.append(count)
+        if count > 1 and len(set(params[start:])) < count:
+            replicated.append(i)
+
+    values = np.full((n, compiled.n_params), np.nan)
+    sample = np.repeat(np.arange(n, dtype=np.intp), counts)
+    rows = sample.copy()
+    replicates = {}
+    if replicated:
+        starts = np.concatenate(([0], np.cumsum(counts)))
+        extra = []   # (sample, param, value) of every reading before the last of its parameter
+        for i in replicated:
+            known = [(k, index[x["name"]], x["value"]) for k, x in enumerate(batches[i]) if x["name"] in index]
+            last = {p: j for j, (_, p, _) in enumerate(known)}
+            for j, (k, p, val) in enumerate(known):
+                if last[p] != j:
+                    replicates[i, k] = rows[starts[i] + j] = n + len(extra)
+                    extra.append((i, p, val))
+                    params[starts[i] + j] = -1   # not written to the sample's row
+    params = np.asarray(params, dtype=np.intp)
+    first = params >= 0
+    values[sample[first], params[first]] = np.asarray(vals, dtype=np.float64)[first]
+    if replicated:
+        ex_rows, ex_params, ex_vals = zip(*extra)
+        copies = values[list(ex_rows)]
+        copies[np.arange(len(extra)), list(ex_params)] = ex_vals
+        values = np.vstack((values, copies))
+        params[~first] = ex_params
+    return values, replicates, (sample, rows, params)
+
+
+def batches_to_matrix(batches, compiled=None):
+    """Pack analyze_batch()-style item lists into a measurement matrix.
+
+    Unknown parameters are skipped. If a parameter appears twice in one
+    sample, the later value wins here; evaluate_batches() evaluates both.
+    """
+    if compiled is None:
+        compiled = compile_standards()
+    return _pack_batches(batches, compiled)[0][:len(batches)]
+
+
+def evaluate_batches(batches, compiled=None, authorities=None):
+    """Vectorized equivalent of calling analyze_batch() on each batch"""
+    if compiled is None:
+        compiled = compile_standards()
+    values, replicates, cells = _pack_batches(batches, compiled)
+    result = evaluate_matrix(values, compiled, authorities)
+    result.batches = batches
+    result.replicates = replicates
+    result.count_items(cells)
+    return result
@@ -1,20 +1,379 @@
 import json
-from fpdf import FPDF
+import os
+import sys
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
 import datetime
 
-DB_FILE = "database.json"
+from rules import compile_rule, limit_label, referenced_parameters
+from compiled_db import LazyIndex, StandardsTable, artifact_path, content_version
+from profiling import span, timed
+
+DB_FILE = os.environ.get("WATERCHECK_DB", "database.json")
+WATCH_INTERVAL = float(os.environ.get("WATERCHECK_DB_WATCH", "2"))   # seconds; 0 disables the watcher
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")   # mirrors sqlite_store, which is only imported to load one
+
+# --- STANDARDS REGISTRY ---
+class _Snapshot:
+    """One loaded version of the standards DB plus its lookup indexes.
+
+    Built either from parsed JSON (data) or from a compiled artifact
+    (table), in which case the parameter dicts are rebuilt lazily.
+    """
+    __slots__ = ("stamp", "version", "table", "names", "derived", "_data", "_by_name", "_by_id")
+
+    def __init__(self, stamp, version, data=None, table=None):
+        self.stamp = stamp
+        self.version = version   # content hash, changes whenever the limits do
+        self.table = table
+        self.derived = {}        # per-version caches built by other modules
+        self._data = data
+        self._by_name = None
+        self._by_id = None
+        if table is not None:
+            self.names = table.sorted_names
+        else:
+            self.names = tuple(sorted(item["name"] for item in data))
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = self.table.to_list()
+        return self._data
+
+    @property
+    def by_name(self):
+        if self._by_name is None:
+            if self.table is not None:
+                self._by_name = LazyIndex(self.table, self.table.name_index)
+            else:
+                self._build_indexes()
+        return self._by_name
+
+    @property
+    def by_id(self):
+        if self._by_id is None:
+            if self.table is not None:
+                self._by_id = LazyIndex(self.table, self.table.id_index)
+            else:
+                self._build_indexes()
+        return self._by_id
+
+    def _build_indexes(self):
+        by_name = {}
+        by_id = {}
+        for item in self._data:
+            # first entry wins, same as the old next(...) scan
+            by_name.setdefault(item["name"], item)
+            if "id" in item:
+                by_id.setdefault(item["id"], item)
+        self._by_id = by_id
+        self._by_name = by_name
+
+
+def validate_standards(data):
+    """Raise ValueError if data is not a usable standards list.
+
+    Returns {parameter name: compiled rules of its standards}, first entry
+    winning like the registry's name index, so the rules are not compiled
+    again for rule_table().
+    """
+    if not isinstance(data, list) or not data:
+        raise ValueError("standards DB must be a non-empty list of parameters")
+    names = set()
+    for item in data:
+        if not isinstance(item, dict) or not isinstance(item.get("name"), str):
+            raise ValueError(f"parameter without a name: {item!r:.80}")
+        names.add(item["name"])
+    compiled = {}
+    for item in data:
+        standards = item.get("standards")
+        if not isinstance(standards, list):
+            raise ValueError(f"{item['name']}: 'standards' must be a list")
+        rules = []
+        for std in standards:
+            if not isinstance(std, dict) or not isinstance(std.get("authority"), str):
+                raise ValueError(f"{item['name']}: standard without an authority")
+            limits = [std.get("min_limit"), std.get("max_limit")]
+            for limit in limits:
+                if limit is not None and (isinstance(limit, bool) or not isinstance(limit, (int, float))):
+                    raise ValueError(f"{item['name']} / {std['authority']}: non-numeric limit {limit!r}")
+            if None not in limits and limits[0] > limits[1]:
+                raise ValueError(f"{item['name']} / {std['authority']}: min_limit above max_limit")
+            try:
+                rule = compile_rule(std)
+            except ValueError as e:
+                raise ValueError(f"{item['name']} / {std['authority']}: {e}")
+            unknown = referenced_parameters(rule) - names
+            if unknown:
+                raise ValueError(f"{item['name']} / {std['authority']}: unknown parameter {min(unknown)!r}")
+            rules.append(rule)
+        compiled.setdefault(item["name"], tuple(rules))
+    return compiled
+
+
+class StandardsRegistry:
+    """Process-wide cache of database.json.
+
+    The file is parsed once and re-parsed only when its mtime or size
+    changes, so a rerun with an unchanged DB costs a couple of stat()
+    calls. If a compiled artifact (see compiled_db.py) is newer than the
+    JSON it is loaded instead. A path ending in .sqlite/.db is read
+    through sqlite_store. Snapshots are never mutated in place; a reload
+    swaps in a new one.
+
+    Long-running servers call watch(): a background thread then notices
+    edits, parses and validates the new file and swaps the snapshot in,
+    so requests never stat, parse or see a half-written DB. pin() holds
+    one snapshot for the current thread (one request or app rerun).
+    """
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._local = threading.local()
+        self._watcher = None
+        self._stop = None
+        self._pending = None       # stamp seen on the previous poll, must settle before loading
+        self._failed = None        # stamp that failed validation, not retried until the file changes
+        self.last_error = None
+        self.loads = 0
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _is_sqlite(self):
+        return str(self.path).lower().endswith(SQLITE_SUFFIXES)
+
+    def _file_stamp(self):
+        if self._is_sqlite():
+            return self._stat(self.path), self._stat(self.path + "-wal")
+        return self._stat(self.path), self._stat(artifact_path(self.path))
+
+    def snapshot(self):
+        snap = getattr(self._local, "snap", None)
+        if snap is not None:
+            return snap
+        snap = self._snapshot
+        if snap is not None and self._watcher is not None:
+            return snap
+        stamp = self._file_stamp()
+        if snap is not None and stamp in (snap.stamp, self._failed):
+            return snap
+        with self._lock:
+            snap = self._snapshot
+            if snap is None or stamp not in (snap.stamp, self._failed):
+                snap = self._swap(stamp, snap)
+            return snap
+
+    def _load(self, stamp):
+        if self._is_sqlite():
+            if stamp[0] is None:
+                return _Snapshot(stamp, "empty", data=[])
+            import sqlite_store   # deferred: JSON deployments never pay for sqlite3
+            with span("load_data.sqlite"):
+                version, data = sqlite_store.load(self.path)
+            return _Snapshot(stamp, version, data=data)
+
+        json_stamp, compiled_stamp = stamp
+        if compiled_stamp is not None and (json_stamp is None or compiled_stamp[0] >= json_stamp[0]):
+            try:
+                with span("load_data.compiled"):
+                    table = StandardsTable.load(artifact_path(self.path))
+                return _Snapshot(stamp, table.version, table=table)
+            except (OSError, ValueError):
+                pass  # unreadable or stale-format artifact, fall back to the JSON
+        version, data = self._read()
+        return _Snapshot(stamp, version, data=data)
+
+    def _swap(self, stamp, current):
+        """Load and validate the file at stamp and make it current (caller holds the lock).
+
+        A file that fails validation is remembered and not retried until it
+        changes; current stays in service, or ValueError is raised if there
+        is none yet. The compiled artifact is validated when it is built
+        (compiled_db.compile_db), so loading it stays parse-free.
+        """
+        try:
+            snap = self._load(stamp)
+            if current is not None or (snap.table is None and snap.version != "empty"):
+                snap.derived[("rules", None)] = _RuleTable(snap, None, validate_standards(snap.data))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self._failed = stamp
+            self.last_error = f"{type(e).__name__}: {e}"
+            if current is None:
+                raise ValueError(f"standards DB {self.path} is invalid: {self.last_error}") from e
+            print(f"standards DB {self.path} not reloaded, keeping {current.version}: {self.last_error}",
+                  file=sys.stderr)
+            return current
+        self._snapshot = snap   # one reference swap: readers see the old or the new index, never a mix
+        self.loads += 1
+        self.last_error = None
+        return snap
+
+    def _read(self):
+        try:
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return "empty", []
+        with span("load_data.parse"):
+            return content_version(raw), json.loads(raw)
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    # --- hot reload ---
+    def watch(self, interval=None):
+        """Start the background reload thread (once per registry); returns it, or None if disabled"""
+        interval = WATCH_INTERVAL if interval is None else interval
+        if interval <= 0:
+            return None
+        with self._lock:
+            if self._watcher is None:
+                if self._snapshot is None:
+                    self._swap(self._file_stamp(), None)
+                self._pending = self._snapshot.stamp
+                self._stop = threading.Event()
+                self._watcher = threading.Thread(target=self._watch_loop, args=(interval, self._stop),
+                                                 name="watercheck-db-watch", daemon=True)
+                self._watcher.start()
+            return self._watcher
+
+    def stop(self):
+        watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            self._stop.set()
+            watcher.join()
+
+    def _watch_loop(self, interval, stop):
+        while not stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:   # the watcher must outlive any one bad reload
+                self.last_error = f"{type(e).__name__}: {e}"
+
+    def refresh(self):
+        """One watcher step: load and validate a changed file, then swap it in. True if swapped."""
+        current = self._snapshot
+        if current is None:
+            return False   # invalidated; the next snapshot() loads it
+        stamp = self._file_stamp()
+        if stamp == current.stamp or stamp == self._failed:
+            self._pending = stamp
+            return False
+        if stamp != self._pending:
+            self._pending = stamp   # still being written? look again on the next poll
+            return False
+        with self._lock, span("load_data.reload"):
+            return self._swap(stamp, current) is not current
+
+    def pin(self):
+        """Make the current thread see this snapshot until unpin(), even if a reload swaps in another"""
+        self._local.snap = None
+        snap = self._local.snap = self.snapshot()
+        return snap
+
+    def unpin(self):
+        self._local.snap = None
+
+    @contextmanager
+    def pinned(self):
+        snap = self.pin()
+        try:
+            yield snap
+        finally:
+            self.unpin()
+
+    def stats(self):
+        """Monitoring view of the shared standards index"""
+        snap = self.snapshot()
+        return {"path": self.path, "version": snap.version, "parameters": len(snap.names),
+                "compiled": snap.table is not None, "loads": self.loads, "derived": len(snap.derived),
+                "watching": self._watcher is not None, "last_error": self.last_error}
+
+
+registry = StandardsRegistry()
 
 # --- HELPERS ---
+@timed("load_data")
 def load_data():
-    try:
-        with open(DB_FILE, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
+    """Parsed standards list (shared, do not mutate)"""
+    return registry.snapshot().data
+
+def get_db_version():
+    return registry.snapshot().version
 
 def get_parameter_names():
-    data = load_data()
-    return sorted([item["name"] for item in data])
+    return registry.snapshot().names
+
+def get_parameter(name):
+    return registry.snapshot().by_name.get(name)
+
+def get_parameter_by_id(param_id):
+    return registry.snapshot().by_id.get(param_id)
+
+def get_authorities(snap=None):
+    """Sorted authority names in the current DB"""
+    snap = snap or registry.snapshot()
+    names = snap.derived.get("authorities")
+    if names is None:
+        names = tuple(sorted({std['authority'] for item in snap.data for std in item['standards']}))
+        snap.derived["authorities"] = names
+    return names
+
+class _RuleTable(dict):
+    """{parameter name: compiled rules of its (selected) standards}, each compiled on first lookup"""
+
+    def __init__(self, snap, selected, compiled=()):
+        super().__init__(compiled)
+        self.snap = snap
+        self.selected = selected
+        self._inputs = {}
+
+    def __missing__(self, name):
+        selected = self.selected
+        if selected is None:
+            item = self.snap.by_name.get(name)
+            rules = () if item is None else tuple(compile_rule(std) for std in item['standards'])
+        else:   # filtered from the full table, so each rule is compiled once per DB version
+            rules = tuple(rule for rule in rule_table(None, self.snap)[name] if rule.std['authority'] in selected)
+        self[name] = rules
+        return rules
+
+    def inputs(self, name):
+        """Sorted names of the other parameters the rules of name read"""
+        names = self._inputs.get(name)
+        if names is None:
+            names = self._inputs[name] = tuple(sorted(set().union(*map(referenced_parameters, self[name]))))
+        return names
+
+def check_authorities(authorities, snap=None):
+    """authorities as a frozenset, None for all (also when empty); ValueError on names not in the DB"""
+    if not authorities:
+        return None
+    selected = frozenset(authorities)
+    unknown = selected.difference(get_authorities(snap))
+    if unknown:
+        raise ValueError(f"unknown authorities: {', '.join(sorted(unknown))}")
+    return selected
+
+def rule_table(authorities=None, snap=None):
+    """Compiled rules per parameter for one authority selection, kept once per DB version"""
+    snap = snap or registry.snapshot()
+    key = ("rules", check_authorities(authorities, snap))
+    table = snap.derived.get(key)
+    if table is None:
+        table = snap.derived.setdefault(key, _RuleTable(snap, key[1]))
+    return table
 
 def sanitize(text):
     """Protects PDF from crashing on special characters"""
@@ -22,90 +381,205 @@ def sanitize(text):
         return str(text)
     return text.encode('latin-1', 'ignore').decode('latin-1')
 
+def pdf_to_bytes(pdf):
+    """Render an FPDF document in memory"""
+    with span("pdf.output"):
+        out = pdf.output(dest='S')
+    if isinstance(out, str):  # pyfpdf returns a latin-1 str, fpdf2 a bytearray
+        out = out.encode('latin-1')
+    return bytes(out)
+
 # --- PART A: BATCH ANALYSIS ---
-def analyze_batch(batch_data):
-    db = load_data()
+STATUS_NAMES = ("PASS", "FAIL", "INFO")    # index is the status code (engine.py uses the same codes)
+STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES)}
+_FAIL = STATUS_CODES["FAIL"]
+_INFO = STATUS_CODES["INFO"]
+_STATUS_STYLE = (
+    ((0, 150, 0), "3"),    # GREEN, Checkmark
+    ((200, 0, 0), "7"),    # RED, X-Mark
+    ((0, 0, 200), "s"),    # BLUE
+)
+_KEYS = ("authority", "status", "limit", "color", "symbol")
+
+
+class StandardResult(Mapping):
+    """One evaluated standard, as consumed by app.py and the PDF.
+
+    Stores only the registry's standard dict, a status code, the
+    violation text and the limit label of its compiled rule; the display
+    fields are derived when read. Behaves as a read-only dict with the
+    keys analyze_batch() results have always had.
+    """
+    __slots__ = ("std", "code", "violation", "label")
+
+    def __init__(self, std, code, violation="", label=None):
+        self.std = std
+        self.code = code
+        self.violation = violation
+        self.label = label      # None: derived from std on first read
+
+    def __getitem__(self, key):
+        std = self.std
+        if key == "authority":
+            return std['authority']
+        if key == "status":
+            return STATUS_NAMES[self.code]
+        if key == "limit":
+            if self.label is None:
+                self.label = limit_label(std)
+            return self.label
+        if key == "color":
+            return _STATUS_STYLE[self.code][0]
+        if key == "symbol":
+            return _STATUS_STYLE[self.code][1]
+        if self.code == _FAIL:
+            if key == "violation":
+                return self.violation
+            if key in ("consequence", "solution") and key in std:
+                return std[key]
+        raise KeyError(key)
+
+    def _keys(self):
+        if self.code != _FAIL:
+            return _KEYS
+        return _KEYS + ("violation",) + tuple(k for k in ("consequence", "solution") if k in self.std)
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def to_dict(self, display=True):
+        """Plain dict copy; display=False leaves out the PDF-only color and symbol"""
+        return {k: self[k] for k in self._keys() if display or k not in ("color", "symbol")}
+
+    def __repr__(self):
+        return f"StandardResult({self.to_dict()!r})"
+
+
+def plain_results(pdf_results, display=True):
+    """Copy of analysis results with every StandardResult turned into a plain dict (e.g. for JSON).
+
+    Also accepts results that are plain dicts already, such as ones read
+    back from the result store.
+    """
+    return [{**res, "standards": [{k: std[k] for k in std if display or k not in ("color", "symbol")}
+                                  for std in res["standards"]]} for res in pdf_results]
+
+
+ANALYSIS_MODES = ("both", "results", "text")
+
+@timed("analyze_batch")
+def analyze_batch(batch_data, mode="both", authorities=None, values=None):
+    """Evaluate a batch against every standard.
+
+    mode="both" returns (gui_text, pdf_results); "results" returns only the
+    structured pdf_results and "text" only gui_text, skipping the work of
+    building the other. authorities restricts evaluation to those
+    authorities' standards; None or [] evaluates all of them and unknown
+    names raise ValueError. values maps every parameter of the sample to
+    its value for rules that read other parameters; it defaults to the
+    batch's own items.
+    """
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"mode must be one of {ANALYSIS_MODES}, got {mode!r}")
+    want_text = mode != "results"
+    want_results = mode != "text"
+
+    snap = registry.snapshot()
+    by_name = snap.by_name
+    rules_by_name = rule_table(authorities, snap)
+    if values is None:
+        values = {item['name']: item['value'] for item in batch_data}   # what cross-parameter rules read
     gui_text = []
     pdf_results = []
     
     # GUI Header
-    gui_text.append(("HEADER", f"COMPREHENSIVE ANALYSIS REPORT"))
-    gui_text.append(("NORMAL", f"Date: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}\n"))
-    gui_text.append(("NORMAL", "="*60 + "\n"))
+    if want_text:
+        gui_text.append(("HEADER", f"COMPREHENSIVE ANALYSIS REPORT"))
+        gui_text.append(("NORMAL", f"Date: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}\n"))
+        gui_text.append(("NORMAL", "="*60 + "\n"))
 
     for item in batch_data:
         p_name = item['name']
         val = item['value']
         
-        param_obj = next((x for x in db if x["name"] == p_name), None)
+        param_obj = by_name.get(p_name)
         if not param_obj: continue
 
-        gui_text.append(("SUBHEADER", f"► {p_name} (Result: {val} {param_obj['unit']})"))
+        if want_text:
+            gui_text.append(("SUBHEADER", f"► {p_name} (Result: {val} {param_obj['unit']})"))
         
         pdf_entry = {
             "parameter": p_name,
             "value": f"{val} {param_obj['unit']}",
-            "standards": []
+            "standards": [],
+            "db_version": snap.version
         }
 
-        for std in param_obj['standards']:
-            authority = std['authority']
-            limit_max = std.get('max_limit')
-            limit_min = std.get('min_limit')
-            
-            is_unsafe = False
-            violation_txt = ""
-
-            if limit_max is not None and val > limit_max:
-                is_unsafe = True
-                violation_txt = f"> {limit_max}"
-            if limit_min is not None and val < limit_min:
-                is_unsafe = True
-                violation_txt = f"< {limit_min}"
-            
-            std_entry = {
-                "authority": authority,
-                "status": "PASS",
-                "limit": f"{limit_min}-{limit_max}" if limit_min else f"Max {limit_max}",
-                "color": (0, 150, 0),    # GREEN
-                "symbol": "3"            # Checkmark
-            }
-
-            if is_unsafe:
-                std_entry.update({
-                    "status": "FAIL",
-                    "color": (200, 0, 0), # RED
-                    "violation": violation_txt,
-                    "consequence": std['consequence'],
-                    "solution": std['solution'],
-                    "symbol": "7"         # X-Mark
-                })
-                gui_text.append(("FAIL", f"   ❌ [{authority}] FAIL: {violation_txt}"))
-                gui_text.append(("NORMAL", f"      Consequence: {std['consequence']}"))
-                gui_text.append(("NORMAL", f"      Solution: {std['solution']}"))
-            
-            elif limit_max is None and limit_min is None:
-                std_entry.update({"status": "INFO", "color": (0, 0, 200), "symbol": "s"}) 
-                gui_text.append(("INFO", f"   ℹ️ [{authority}] INFO: No Limit"))
-            
-            else:
-                gui_text.append(("PASS", f"   ✅ [{authority}] PASS"))
+        for rule in rules_by_name[p_name]:
+            code, violation_txt = rule.evaluate(val, values)
+            if code is None:
+                continue    # conditional standard that does not apply to this sample
+            std = rule.std
+
+            if want_text:
+                authority = std['authority']
+                if code == _FAIL:
+                    gui_text.append(("FAIL", f"   ❌ [{authority}] FAIL: {violation_txt}"))
+                    gui_text.append(("NORMAL", f"      Consequence: {std.get('consequence', 'Risk detected.')}"))
+                    gui_text.append(("NORMAL", f"      Solution: {std.get('solution', 'Consult civil engineer.')}"))
+                elif code == _INFO:
+                    note = "No Limit" if rule.label == "No Limit" else f"Not evaluated ({rule.label})"
+                    gui_text.append(("INFO", f"   ℹ️ [{authority}] INFO: {note}"))
+                else:
+                    gui_text.append(("PASS", f"   ✅ [{authority}] PASS"))
             
-            pdf_entry["standards"].append(std_entry)
+            if want_results:
+                pdf_entry["standards"].append(StandardResult(std, code, violation_txt, rule.label))
 
-        pdf_results.append(pdf_entry)
-        gui_text.append(("NORMAL", "-"*40 + "\n"))
+        if want_results:
+            pdf_results.append(pdf_entry)
+        if want_text:
+            gui_text.append(("NORMAL", "-"*40 + "\n"))
 
+    if mode == "results":
+        return pdf_results
+    if mode == "text":
+        return gui_text
     return gui_text, pdf_results
 
-def save_comprehensive_pdf(results):
+def results_db_version(results):
+    """Standards DB version the results were evaluated against (the current one if they do not say)"""
+    for res in results:
+        if res.get("db_version"):
+            return res["db_version"]
+    return get_db_version()
+
+def analyze_item(name, value, authorities=None, context=None):
+    """Structured result for a single parameter reading, or None for an unknown parameter.
+
+    context maps the other parameters of the sample to their values, for
+    standards whose rules read them (see rule_table(...).inputs()).
+    """
+    values = {**context, name: value} if context else None
+    results = analyze_batch([{"name": name, "value": value}], mode="results", authorities=authorities,
+                            values=values)
+    return results[0] if results else None
+
+@timed("save_comprehensive_pdf")
+def save_comprehensive_pdf(results, as_bytes=False):
+    """Render the analysis report; returns the PDF bytes if as_bytes, else the written filename"""
+    from fpdf import FPDF   # imported on first PDF only: fpdf pulls in PIL and urllib (~60 ms)
     pdf = FPDF()
     pdf.add_page()
     
     pdf.set_font("Arial", 'B', 16)
     pdf.cell(0, 10, "Comprehensive Water Quality Report", ln=True, align='C')
     pdf.set_font("Arial", 'I', 10)
-    pdf.cell(0, 10, f"Generated on: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}", ln=True, align='C')
+    pdf.cell(0, 10, f"Generated on: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}  -  "
+                    f"Standards DB {results_db_version(results)}", ln=True, align='C')
     pdf.ln(10)
     
     # SUMMARY TABLE
@@ -159,20 +633,30 @@ def save_comprehensive_pdf(results):
             pdf.cell(0, 6, f" {sanitize(std['authority'])} (Limit: {sanitize(std['limit'])})", ln=True)
             
             pdf.set_text_color(50, 50, 50)
-            if "consequence" in std:
-                clean_cons = sanitize(std['consequence'])
-                clean_sol = sanitize(std['solution'])
+            if "consequence" in std or "solution" in std:   # both are optional in the DB
+                clean_cons = sanitize(std.get('consequence', 'Risk detected.'))
+                clean_sol = sanitize(std.get('solution', 'Consult civil engineer.'))
                 pdf.multi_cell(0, 5, f"      Risk: {clean_cons}")
                 pdf.multi_cell(0, 5, f"      Fix: {clean_sol}")
                 pdf.ln(2)
         pdf.ln(3)
 
+    if as_bytes:
+        return pdf_to_bytes(pdf)
+
     filename = f"Analysis_Report_{datetime.datetime.now().strftime('%M%S')}.pdf"
-    pdf.output(filename)
+    with span("pdf.output"):
+        pdf.output(filename)
     return filename
 
 # --- PART B: PROPOSAL (UPDATED) ---
-def generate_proposal(inputs):
+CITY_PER_CAPITA = 120      # Liters/person/day
+VILLAGE_PER_CAPITA = 60
+PEAK_FACTOR = 1.15         # Q_max / Q_avg
+
+@timed("generate_proposal")
+def generate_proposal(inputs, as_bytes=False):
+    """Render the design proposal; returns the PDF bytes if as_bytes, else the written filename"""
     # 1. SETUP VARIABLES
     p_current = inputs['pop_current']
     rate = inputs['growth_rate']
@@ -191,7 +675,7 @@ def generate_proposal(inputs):
         
         calc_steps.append(f"GROWTH FACTOR: {factor:.4f}")
         calc_steps.append(f"RESULT: {p_future:,} people")
-        per_capita = 120
+        per_capita = CITY_PER_CAPITA
         
     else: # Village (Arithmetic)
         method = "Arithmetic Progression Method"
@@ -206,20 +690,20 @@ def generate_proposal(inputs):
         
         p_future = int(p_current + (years * yearly_increase))
         calc_steps.append(f"RESULT: {p_future:,} people")
-        per_capita = 60
+        per_capita = VILLAGE_PER_CAPITA
 
     # 3. DEMAND CALCULATIONS (With Steps)
     demand_steps = []
     avg_daily_demand = p_future * per_capita
-    max_daily_demand = avg_daily_demand * 1.15
+    max_daily_demand = avg_daily_demand * PEAK_FACTOR
     
     demand_steps.append(f"Assumed Per Capita Demand: {per_capita} Liters/person/day (based on community type)")
     demand_steps.append(f"AVG DAILY DEMAND (Q_avg) = Population * Per Capita")
     demand_steps.append(f"                       = {p_future:,} * {per_capita}")
     demand_steps.append(f"                       = {avg_daily_demand:,.0f} Liters/day")
     
-    demand_steps.append(f"MAX DAILY DEMAND (Q_max) = Q_avg * Peak Factor (1.15)")
-    demand_steps.append(f"                       = {avg_daily_demand:,.0f} * 1.15")
+    demand_steps.append(f"MAX DAILY DEMAND (Q_max) = Q_avg * Peak Factor ({PEAK_FACTOR})")
+    demand_steps.append(f"                       = {avg_daily_demand:,.0f} * {PEAK_FACTOR}")
     demand_steps.append(f"                       = {max_daily_demand:,.0f} Liters/day")
 
     # 4. EXPANDED TREATMENT LOGIC
@@ -260,6 +744,7 @@ def generate_proposal(inputs):
         ]
 
     # --- PDF GENERATION ---
+    from fpdf import FPDF
     pdf = FPDF()
     pdf.add_page()
     
@@ -321,6 +806,10 @@ def generate_proposal(inputs):
         pdf.multi_cell(0, 5, desc)
         pdf.ln(3)
     
+    if as_bytes:
+        return pdf_to_bytes(pdf)
+
     filename = f"Proposal_{inputs['name'].replace(' ', '_')}.pdf"
-    pdf.output(filename)
+    with span("pdf.output"):
+        pdf.output(filename)
     return filename
\ No newline at end of file
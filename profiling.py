@@ -0,0 +1,119 @@
+"""Lightweight timing spans.
+
+Disabled unless WATERCHECK_PROFILE=1 (or enable() is called); a disabled
+span is a shared no-op object, so instrumented code pays one flag check.
+When enabled every span is written as one JSON line to the
+"watercheck.profile" logger (stderr, or the file named by
+WATERCHECK_PROFILE_LOG) and added to the current thread's run, which
+app.py shows in its debug panel.
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("watercheck.profile")
+
+_enabled = False
+_local = threading.local()
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+    if on and not logger.handlers:
+        path = os.environ.get("WATERCHECK_PROFILE_LOG")
+        handler = logging.FileHandler(path) if path else logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+# --- SPANS ---
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """Context manager timing the enclosed block"""
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def timed(name):
+    """Decorator timing every call of the wrapped function"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _record(name, ms):
+    spans = getattr(_local, "spans", None)
+    if spans is not None:
+        spans.append((name, ms))
+    logger.info(json.dumps({
+        "ts": round(time.time(), 3),
+        "run": getattr(_local, "run_id", None),
+        "span": name,
+        "ms": round(ms, 3),
+    }))
+
+
+# --- RUNS ---
+def begin_run(run_id=None):
+    """Start collecting this thread's spans; returns the list they are appended to"""
+    _local.spans = []
+    _local.run_id = run_id
+    _local.run_start = time.perf_counter()
+    return _local.spans
+
+
+def end_run(name="run"):
+    """Stop collecting; records the whole run as a span and returns all spans"""
+    spans = getattr(_local, "spans", None)
+    if spans is None:
+        return []
+    _record(name, (time.perf_counter() - _local.run_start) * 1000)
+    _local.spans = None
+    _local.run_id = None
+    return spans
+
+
+if os.environ.get("WATERCHECK_PROFILE", "") not in ("", "0"):
+    enable()
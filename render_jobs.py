@@ -0,0 +1,244 @@
+"""Parallel PDF rendering for regional programs.
+
+Renders design proposals and analysis reports for many communities
+across a process pool and streams each finished PDF straight into a ZIP
+archive (or a directory). The manifest is read lazily and only a few
+PDFs per worker are ever in flight, so memory stays bounded however
+many jobs there are. A failing job is recorded and the run carries on.
+
+    python render_jobs.py jobs.jsonl -o region.zip --workers 8
+
+Each manifest line (or element of a JSON array) is one job:
+
+    {"kind": "proposal", "name": ..., "source": ..., "type": ...,
+     "pop_current": ..., "growth_rate": ..., "design_period": ...}
+    {"kind": "report", "name": ..., "batch": [{"name": ..., "value": ...}],
+     "authorities": [...]}                      # authorities optional
+    {"kind": "samples", "name": ..., "samples": [{"sample_id": ..., "batch": [...]}],
+     "authorities": [...]}                      # one multi-sample report
+
+Failures are listed in _failures.jsonl inside the archive (or directory).
+Reports and proposals found in the on-disk result store (result_store.py)
+are copied from it instead of being rendered again.
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import cache
+import logic
+import report_pdf
+
+FAILURES_NAME = "_failures.jsonl"
+
+
+# --- WORKER ---
+def _init_worker(db_path):
+    logic.registry.path = db_path
+    logic.registry.invalidate()
+
+
+def safe_filename(name):
+    return re.sub(r"[^\w.-]+", "_", str(name)).strip("._") or "unnamed"
+
+
+def _batch(items):
+    return [{"name": str(item["name"]), "value": float(item["value"])} for item in items]
+
+
+def render_job(job):
+    """(filename, pdf bytes) for one manifest entry; runs in a pool worker"""
+    kind = job.get("kind")
+    if kind == "proposal":
+        inputs = dict(job, pop_current=int(job["pop_current"]), growth_rate=float(job["growth_rate"]),
+                      design_period=int(job["design_period"]))
+        return f"Proposal_{safe_filename(job['name'])}.pdf", cache.cached_proposal(inputs)
+    if kind == "report":
+        return f"Report_{safe_filename(job['name'])}.pdf", cache.cached_pdf(_batch(job["batch"]), job.get("authorities"))
+    if kind == "samples":
+        samples = [(str(s["sample_id"]), logic.analyze_batch(_batch(s["batch"]), mode="results",
+                                                            authorities=job.get("authorities")))
+                   for s in job["samples"]]
+        return f"Samples_{safe_filename(job['name'])}.pdf", report_pdf.save_samples_pdf(samples, as_bytes=True)
+    raise ValueError(f"unknown job kind {kind!r}")
+
+
+# --- OUTPUT ---
+class _Sink:
+    names = ()
+
+    def _unique(self, name):
+        stem, ext = os.path.splitext(name)
+        n = 1
+        while name in self.names:
+            n += 1
+            name = f"{stem}_{n}{ext}"
+        self.names.add(name)
+        return name
+
+
+class ZipSink(_Sink):
+    """Writes each PDF into a ZIP archive as soon as it arrives"""
+
+    def __init__(self, path):
+        self.zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+        self.names = set()
+
+    def write(self, name, data):
+        name = self._unique(name)
+        self.zip.writestr(name, data)
+        return name
+
+    def close(self):
+        self.zip.close()
+
+
+class DirSink(_Sink):
+    """Writes each PDF into a directory instead"""
+
+    def __init__(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.names = set(os.listdir(path))
+
+    def write(self, name, data):
+        name = self._unique(name)
+        tmp = os.path.join(self.path, f".{name}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, os.path.join(self.path, name))
+        return name
+
+    def close(self):
+        pass
+
+
+# --- RUN ---
+def read_manifest(stream):
+    """Yield jobs from a JSONL stream, or from a JSON array if the stream holds one.
+
+    A line that is not valid JSON is yielded as a ValueError so run() can
+    record it and continue.
+    """
+    first = stream.readline()
+    if first.lstrip().startswith("["):
+        yield from json.loads(first + stream.read())
+        return
+    for n, line in enumerate(itertools.chain([first], stream), 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield ValueError(f"line {n} is not valid JSON")
+
+
+def print_progress(done, name, error, log=sys.stderr):
+    status = f"FAILED: {error}" if error else "ok"
+    print(f"[{done}] {name} {status}", file=log)
+
+
+def run(jobs, sink, workers=None, db_path=logic.DB_FILE, in_flight=2, progress=print_progress):
+    """Render jobs in parallel into sink; returns counters and the failure list.
+
+    At most workers * in_flight jobs are submitted but not yet written.
+    """
+    workers = workers or os.cpu_count() or 1
+    limit = max(1, workers * in_flight)
+    stats = {"jobs": 0, "written": 0, "failed": 0, "bytes": 0}
+    failures = []
+    start = time.perf_counter()
+
+    def fail(index, job, error):
+        stats["failed"] += 1
+        name = job.get("name") if isinstance(job, dict) else None
+        failures.append({"index": index, "name": name, "error": error})
+        progress(stats["written"] + stats["failed"], name or f"job {index}", error)
+
+    def new_pool():
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(db_path,))
+
+    pool = new_pool()
+    pending = {}
+    try:
+        jobs = iter(enumerate(jobs))
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < limit:
+                try:
+                    index, job = next(jobs)
+                except StopIteration:
+                    exhausted = True
+                    break
+                stats["jobs"] += 1
+                if not isinstance(job, dict):
+                    fail(index, job, str(job) if isinstance(job, ValueError) else "job must be a JSON object")
+                    continue
+                pending[pool.submit(render_job, job)] = (index, job)
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                index, job = pending.pop(future)
+                try:
+                    name, data = future.result()
+                except BrokenProcessPool:
+                    broken = True
+                    fail(index, job, "worker process died")
+                except Exception as e:
+                    fail(index, job, f"{type(e).__name__}: {e}")
+                else:
+                    written = sink.write(name, data)
+                    stats["written"] += 1
+                    stats["bytes"] += len(data)
+                    progress(stats["written"] + stats["failed"], written, None)
+            if broken:
+                # every job still queued on the dead pool is lost with it
+                for future, (index, job) in pending.items():
+                    fail(index, job, "worker process died")
+                pending.clear()
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = new_pool()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    if failures:
+        sink.write(FAILURES_NAME, "".join(json.dumps(f) + "\n" for f in failures).encode("utf-8"))
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return stats, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render proposals and reports for many communities in parallel.")
+    parser.add_argument("manifest", help="JSONL (or JSON array) of jobs ('-' for stdin)")
+    parser.add_argument("-o", "--output", required=True, help="a .zip archive, or a directory")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--db", default=logic.DB_FILE, help="standards database (default: %(default)s)")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args(argv)
+
+    sink = ZipSink(args.output) if args.output.endswith(".zip") else DirSink(args.output)
+    stream = sys.stdin if args.manifest == "-" else open(args.manifest, "r", encoding="utf-8")
+    try:
+        stats, _ = run(read_manifest(stream), sink, args.workers, args.db,
+                       progress=(lambda *a: None) if args.quiet else print_progress)
+    finally:
+        sink.close()
+        if stream is not sys.stdin:
+            stream.close()
+    print(f"{stats['written']} of {stats['jobs']} PDFs written to {args.output} "
+          f"({stats['failed']} failed) in {stats['seconds']}s", file=sys.stderr)
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""Multi-sample analysis report for large lab panels.
+
+save_comprehensive_pdf() suits one batch on a page or two. This renderer
+puts any number of samples into one document: an overview table of all
+samples, then per sample a results table and its issues and solutions.
+Tables are paged with the header row repeated, issue blocks are kept
+whole across page breaks, and every cell is drawn through a few shared
+layout templates, so render time and memory grow linearly with the
+number of rows (see the samples_pdf stage in bench.py).
+
+    samples = [("S-001", analyze_batch(batch, mode="results")), ...]
+    pdf_bytes = save_samples_pdf(samples, as_bytes=True)
+"""
+import datetime
+import math
+from collections.abc import Sequence
+
+from logic import pdf_to_bytes, results_db_version, sanitize
+from profiling import span, timed
+
+ROW_H = 6
+TEXT_H = 5
+
+
+# --- LAYOUT TEMPLATES ---
+class Style:
+    """Font and colors applied as one unit"""
+    __slots__ = ("family", "weight", "size", "color", "fill")
+
+    def __init__(self, family="Arial", weight="", size=9, color=(0, 0, 0), fill=None):
+        self.family = family
+        self.weight = weight
+        self.size = size
+        self.color = color
+        self.fill = fill
+
+
+TITLE = Style(weight="B", size=16)
+SUBTITLE = Style(weight="I", size=10)
+HEADING = Style(weight="B", size=12)
+SAMPLE_HEADING = Style(weight="B", size=11, fill=(220, 230, 241))
+TABLE_HEADER = Style(weight="B", fill=(240, 240, 240))
+CELL = Style()
+PASS_CELL = Style(weight="B", color=(0, 150, 0))
+FAIL_CELL = Style(weight="B", color=(200, 0, 0))
+INFO_CELL = Style(weight="B", color=(0, 0, 200))
+ISSUE_TITLE = Style(weight="B", size=9, color=(200, 0, 0))
+ISSUE_TEXT = Style(size=9, color=(50, 50, 50))
+STATUS_STYLES = {"PASS": PASS_CELL, "FAIL": FAIL_CELL, "INFO": INFO_CELL, "SAFE": PASS_CELL, "UNSAFE": FAIL_CELL}
+
+
+class Pen:
+    """Thin wrapper over FPDF that only emits font/color changes when the style actually changes"""
+
+    def __init__(self, pdf):
+        self.pdf = pdf
+        self._style = None
+        self._fitted = {}   # (style, width, text) -> text as drawn; names and limits repeat a lot
+
+    def use(self, style):
+        if style is self._style:
+            return
+        pdf = self.pdf
+        pdf.set_font(style.family, style.weight, style.size)
+        pdf.set_text_color(*style.color)
+        if style.fill is not None:
+            pdf.set_fill_color(*style.fill)
+        self._style = style
+
+    def fit(self, text, width):
+        """text, shortened with '...' if it would overflow a cell of this width"""
+        key = (self._style, width, text)
+        fitted = self._fitted.get(key)
+        if fitted is None:
+            pdf = self.pdf
+            room = width - 2 * pdf.c_margin
+            fitted = text
+            if pdf.get_string_width(text) > room:
+                while fitted and pdf.get_string_width(fitted + "...") > room:
+                    fitted = fitted[:-1]
+                fitted += "..."
+            if len(self._fitted) >= 4096:
+                self._fitted.clear()
+            self._fitted[key] = fitted
+        return fitted
+
+    def space_left(self):
+        return self.pdf.page_break_trigger - self.pdf.get_y()
+
+
+class Table:
+    """Column layout reused for every row; the header repeats at the top of each page"""
+
+    def __init__(self, columns):
+        self.columns = columns   # (title, width, align)
+
+    def header(self, pen):
+        pen.use(TABLE_HEADER)
+        pdf = pen.pdf
+        for title, width, align in self.columns:
+            pdf.cell(width, ROW_H, title, 1, 0, align, 1)
+        pdf.ln()
+
+    def start(self, pen):
+        if pen.space_left() < 3 * ROW_H:
+            pen.pdf.add_page()
+        self.header(pen)
+
+    def row(self, pen, values, styles=None):
+        pdf = pen.pdf
+        if pen.space_left() < ROW_H:
+            pdf.add_page()
+            self.header(pen)
+        for n, ((_, width, align), text) in enumerate(zip(self.columns, values)):
+            pen.use(styles[n] if styles and styles[n] else CELL)
+            pdf.cell(width, ROW_H, pen.fit(text, width), 1, 0, align)
+        pdf.ln()
+
+
+OVERVIEW = Table((("Sample", 70, "L"), ("Parameters", 30, "C"), ("Flagged", 30, "C"), ("Status", 60, "L")))
+RESULTS = Table((("Parameter", 55, "L"), ("Value", 32, "C"), ("Authority", 43, "L"),
+                 ("Limit", 30, "C"), ("Status", 30, "C")))
+
+
+# --- DOCUMENT ---
+class _Chunks:
+    """Append-only text buffer that knows its length without joining"""
+    __slots__ = ("parts", "size")
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def append(self, s):
+        self.parts.append(s)
+        self.size += len(s)
+
+    def __len__(self):
+        return self.size
+
+
+_document_class = None
+
+
+def document():
+    """New FPDF document that buffers output in lists.
+
+    pyfpdf appends every PDF operator to a str attribute, which copies the
+    whole page (and, at output, the whole file) each time and turns large
+    reports quadratic. Page content and the file body are collected as
+    chunks here and joined once.
+    """
+    global _document_class
+    if _document_class is None:
+        from fpdf import FPDF
+
+        class Document(FPDF):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.buffer = _Chunks()
+                self._page_parts = {}
+
+            def _out(self, s):
+                if isinstance(s, bytes):
+                    s = s.decode("latin1")
+                elif not isinstance(s, str):
+                    s = str(s)
+                if self.state == 2:
+                    parts = self._page_parts.get(self.page)
+                    if parts is None:
+                        parts = self._page_parts[self.page] = []
+                    parts.append(s + "\n")
+                else:
+                    self.buffer.append(s + "\n")
+
+            def _endpage(self):
+                # one string per finished page instead of thousands of small ones
+                self.pages[self.page] = "".join(self._page_parts.pop(self.page, ()))
+                super()._endpage()
+
+            def _enddoc(self):
+                super()._enddoc()
+                self.buffer = "".join(self.buffer.parts)
+
+            def footer(self):
+                self.set_y(-12)
+                self.set_font("Arial", 'I', 8)
+                self.set_text_color(120, 120, 120)
+                self.cell(0, 6, f"Page {self.page_no()}/{{nb}}", 0, 0, 'C')
+
+        _document_class = Document
+    return _document_class()
+
+
+# --- RENDERING ---
+def _flagged(results):
+    return sum(1 for res in results if any(std['status'] == "FAIL" for std in res['standards']))
+
+
+def _issue(pen, res, std, width):
+    """One failed standard with its risk and fix, kept on a single page"""
+    pdf = pen.pdf
+    title = sanitize(f"{res['parameter']} - {std['authority']}: {std.get('violation', '')}")
+    lines = [sanitize(f"Risk: {std.get('consequence', '')}"), sanitize(f"Fix: {std.get('solution', '')}")]
+    pen.use(ISSUE_TEXT)
+    n_lines = sum(max(1, math.ceil(pdf.get_string_width(t) / (width - 2 * pdf.c_margin))) for t in lines)
+    if pen.space_left() < TEXT_H * (n_lines + 1) + 2:
+        pdf.add_page()
+    pen.use(ISSUE_TITLE)
+    pdf.cell(0, TEXT_H, pen.fit(title, width), ln=True)
+    pen.use(ISSUE_TEXT)
+    for text in lines:
+        pdf.set_x(pdf.l_margin + 4)
+        pdf.multi_cell(width - 4, TEXT_H, text)
+    pdf.ln(2)
+
+
+def _sample(pen, sample_id, results):
+    pdf = pen.pdf
+    flagged = _flagged(results)
+    if pen.space_left() < 4 * ROW_H:
+        pdf.add_page()
+    pen.use(SAMPLE_HEADING)
+    pdf.cell(0, 8, sanitize(f"Sample {sample_id}: {len(results)} parameters, {flagged} flagged"), 1, 1, 'L', 1)
+    pdf.ln(1)
+
+    RESULTS.start(pen)
+    issues = []
+    for res in results:
+        parameter, value = sanitize(res['parameter']), sanitize(res['value'])
+        for std in res['standards']:
+            status = std['status']
+            RESULTS.row(pen, (parameter, value, sanitize(std['authority']), sanitize(std['limit']), status),
+                        (None, None, None, None, STATUS_STYLES[status]))
+            if status == "FAIL":
+                issues.append((res, std))
+
+    if issues:
+        pdf.ln(2)
+        width = pdf.w - pdf.l_margin - pdf.r_margin
+        for res, std in issues:
+            _issue(pen, res, std, width)
+    pdf.ln(4)
+
+
+@timed("save_samples_pdf")
+def save_samples_pdf(samples, as_bytes=False, filename=None):
+    """Render a sequence of (sample_id, pdf_results) into one report.
+
+    samples is iterated twice (overview, then details); pass an
+    EvaluationSamples to build each sample's results on demand instead
+    of holding them all. Returns the PDF bytes if as_bytes, else the
+    written filename.
+    """
+    pdf = document()
+    pdf.alias_nb_pages()
+    pdf.set_auto_page_break(True, margin=15)
+    pen = Pen(pdf)
+    pdf.add_page()
+
+    pen.use(TITLE)
+    pdf.cell(0, 10, "Multi-Sample Water Quality Report", ln=True, align='C')
+    pen.use(SUBTITLE)
+    db_version = results_db_version(samples[0][1] if len(samples) else ())
+    pdf.cell(0, 8, f"Generated on: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}  -  "
+                   f"{len(samples)} samples  -  Standards DB {db_version}", ln=True, align='C')
+    pdf.ln(6)
+
+    with span("samples_pdf.overview"):
+        pen.use(HEADING)
+        pdf.cell(0, 10, "1. OVERVIEW", ln=True)
+        OVERVIEW.start(pen)
+        for sample_id, results in samples:
+            flagged = _flagged(results)
+            status = "UNSAFE" if flagged else "SAFE"
+            OVERVIEW.row(pen, (sanitize(str(sample_id)), str(len(results)), str(flagged),
+                               "FLAGGED ISSUES" if flagged else "PASSED"),
+                         (None, None, None, STATUS_STYLES[status]))
+
+    with span("samples_pdf.details"):
+        pdf.add_page()
+        pen.use(HEADING)
+        pdf.cell(0, 10, "2. RESULTS BY SAMPLE", ln=True)
+        for sample_id, results in samples:
+            _sample(pen, sample_id, results)
+
+    if as_bytes:
+        return pdf_to_bytes(pdf)
+    filename = filename or f"Samples_Report_{datetime.datetime.now().strftime('%M%S')}.pdf"
+    with span("pdf.output"):
+        pdf.output(filename)
+    return filename
+
+
+class EvaluationSamples(Sequence):
+    """(sample_id, results) view over an engine.MatrixEvaluation, built one sample at a time"""
+
+    def __init__(self, sample_ids, evaluation):
+        self.sample_ids = sample_ids
+        self.evaluation = evaluation
+
+    def __getitem__(self, i):
+        return self.sample_ids[i], self.evaluation.results(i)
+
+    def __len__(self):
+        return len(self.sample_ids)
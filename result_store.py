@@ -0,0 +1,207 @@
+"""Persistent on-disk store for analysis results and rendered PDFs.
+
+Sits behind the in-memory caches in cache.py so a restarted worker can
+serve a repeat report without analyzing or rendering it again. Entries
+are addressed by a hash of their inputs (batch or proposal inputs, the
+standards DB version and authority selection, and for PDFs the day they
+were rendered); see cache.batch_key().
+
+    .watercheck_store/v1/3f/3fa9...e1.pdf
+    .watercheck_store/v1/3f/3fa9...e1.json
+
+Every write goes to a temporary file in the same directory and is moved
+into place with os.replace(), so readers in any process see a complete
+entry or none. A hit touches the file's mtime, and once the store grows
+past its size cap the least recently used entries are deleted down to
+90% of it. Each process rescans after writing a tenth of the cap, so
+with several writers the store can briefly exceed the cap by that much
+per process. Nothing is locked: two processes evicting at once only
+delete a few extra entries, and a file that vanishes mid-read is a miss.
+
+WATERCHECK_STORE sets the directory ("" disables the store) and
+WATERCHECK_STORE_MB the cap (default 256).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+STORE_DIR = os.environ.get("WATERCHECK_STORE", ".watercheck_store")
+STORE_MB = float(os.environ.get("WATERCHECK_STORE_MB", 256))
+FORMAT = "v1"          # bump when the stored result or PDF layout changes
+LOW_WATER = 0.9
+STALE_TMP = 3600       # seconds before an orphaned temp file is swept
+
+
+def content_key(*parts):
+    """sha256 over the parts as canonical JSON"""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _complete(kind, data):
+    # an entry written without fsync can come back truncated after a crash
+    if kind == "pdf":
+        return data.startswith(b"%PDF") and b"%%EOF" in data[-16:]
+    return bool(data)
+
+
+class ResultStore:
+    """Size-capped, LRU-evicted blob store shared by every process using the same directory"""
+
+    def __init__(self, path=STORE_DIR, max_bytes=int(STORE_MB * 1024 * 1024)):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._root = os.path.join(path, FORMAT)
+        self._lock = threading.Lock()
+        self._bytes = None        # last scanned total plus this process's writes since
+        self._since_scan = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def _file(self, key, kind):
+        return os.path.join(self._root, key[:2], f"{key}.{kind}")
+
+    # --- blobs ---
+    def get(self, key, kind):
+        """Stored bytes, or None"""
+        path = self._file(key, kind)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            data = None
+        if data is not None and not _complete(kind, data):
+            self._remove(path)
+            data = None
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        try:
+            os.utime(path)   # mtime is the LRU clock; atime is often disabled
+        except OSError:
+            pass
+        return data
+
+    def put(self, key, kind, data):
+        if len(data) > self.max_bytes * (1 - LOW_WATER):
+            return   # would evict a large part of the store for one entry
+        path = self._file(key, kind)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            self._remove(tmp)
+            return
+        with self._lock:
+            self.writes += 1
+            self._since_scan += len(data)
+            if self._bytes is not None:
+                self._bytes += len(data)
+            # other processes write too, so rescan after every tenth of the cap
+            due = self._bytes is None or self._bytes > self.max_bytes or self._since_scan > self.max_bytes / 10
+        if due:
+            self.evict()
+
+    def get_json(self, key):
+        data = self.get(key, "json")
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            self._remove(self._file(key, "json"))
+            return None
+
+    def put_json(self, key, obj):
+        self.put(key, "json", json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+    # --- eviction ---
+    def _scan(self):
+        """[(mtime, size, path)] of every entry; sweeps stale temp files on the way"""
+        entries = []
+        now = time.time()
+        try:
+            shards = list(os.scandir(self._root))
+        except OSError:
+            return entries
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            try:
+                files = list(os.scandir(shard.path))
+            except OSError:
+                continue
+            for f in files:
+                try:
+                    st = f.stat()
+                except OSError:
+                    continue
+                if f.name.endswith(".tmp"):
+                    if now - st.st_mtime > STALE_TMP:
+                        self._remove(f.path)
+                    continue
+                entries.append((st.st_mtime, st.st_size, f.path))
+        return entries
+
+    def evict(self):
+        """Rescan the store and delete least recently used entries while it is over the cap"""
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        if total > self.max_bytes:
+            entries.sort()
+            target = self.max_bytes * LOW_WATER
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                self._remove(path)
+                total -= size
+                removed += 1
+        with self._lock:
+            self._bytes = total
+            self._since_scan = 0
+            self.evictions += removed
+        return removed
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass   # already gone, or still open elsewhere on Windows
+
+    def clear(self):
+        for _, _, path in self._scan():
+            self._remove(path)
+        with self._lock:
+            self._bytes = 0
+            self._since_scan = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"path": self.path, "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "writes": self.writes,
+                    "evictions": self.evictions, "hit_rate": round(self.hits / lookups, 4) if lookups else None}
+
+
+store = ResultStore() if STORE_DIR else None
+
+
+def configure(path=None, max_mb=None):
+    """Point the shared store at another directory or cap; path="" disables it"""
+    global store
+    path = (store.path if store else STORE_DIR) if path is None else path
+    max_bytes = (store.max_bytes if store else int(STORE_MB * 1024 * 1024)) if max_mb is None \
+        else int(max_mb * 1024 * 1024)
+    store = ResultStore(path, max_bytes) if path else None
+    return store
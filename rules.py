@@ -0,0 +1,232 @@
+"""Compiled evaluation rules for the standards DB.
+
+A standard is a plain min_limit/max_limit check on its own parameter
+unless it carries one of these keys:
+
+    "ratio_to": "Conductivity"      check value / Conductivity instead
+    "when": {"parameter": "pH Level", "min": 6.5, "max": 8.5}
+                                    only applies while 6.5 <= pH < 8.5;
+                                    a list of conditions must all hold
+    "any_of": [{"max_limit": 0}, {"parameter": "Total Coliforms", "max_limit": 0}]
+                                    passes if any one check passes; each
+                                    check may name another parameter and
+                                    use ratio_to
+
+compile_rule() turns a standard into predicate objects once per DB
+version (logic.rule_table, engine.CompiledStandards), so evaluating a
+batch never reads the JSON again. A rule whose inputs were not measured
+reports INFO; one whose condition does not hold is left out.
+"""
+
+PASS, FAIL, INFO = 0, 1, 2     # same codes as logic.STATUS_NAMES
+RULE_KEYS = ("ratio_to", "when", "any_of")
+
+
+def is_plain(std):
+    return not any(key in std for key in RULE_KEYS)
+
+
+def range_label(lo, hi):
+    if lo is not None and hi is not None:
+        return f"{lo}-{hi}"
+    if lo is not None:
+        return f"Min {lo}"
+    if hi is not None:
+        return f"Max {hi}"
+    return "No Limit"
+
+
+# --- PREDICATES ---
+class Operand:
+    """The value a check or condition looks at: a parameter, optionally divided by another"""
+    __slots__ = ("parameter", "ratio_to", "name")
+
+    def __init__(self, parameter=None, ratio_to=None):
+        self.parameter = parameter   # None = the standard's own parameter
+        self.ratio_to = ratio_to
+        parts = [parameter] if parameter else []
+        if ratio_to:
+            parts.append(f"ratio to {ratio_to}")
+        self.name = " ".join(parts)
+
+    def value(self, own, values):
+        x = own if self.parameter is None else values.get(self.parameter)
+        if x is None or self.ratio_to is None:
+            return x
+        d = values.get(self.ratio_to)
+        return x / d if d else None   # unmeasured or zero divisor
+
+
+class Check:
+    """min/max limits on one operand"""
+    __slots__ = ("operand", "lo", "hi", "label")
+
+    def __init__(self, operand, lo, hi):
+        self.operand = operand
+        self.lo = lo
+        self.hi = hi
+        self.label = range_label(lo, hi) if operand is None else f"{operand.name} {range_label(lo, hi)}"
+
+    def evaluate(self, own, values):
+        """(status code, violation text)"""
+        lo, hi = self.lo, self.hi
+        if lo is None and hi is None:
+            return INFO, ""
+        x = own if self.operand is None else self.operand.value(own, values)
+        if x is None:
+            return INFO, ""
+        if lo is not None and x < lo:
+            return FAIL, self.violation_text(True)
+        if hi is not None and x > hi:
+            return FAIL, self.violation_text(False)
+        return PASS, ""
+
+    def violation_text(self, below):
+        text = f"< {self.lo}" if below else f"> {self.hi}"
+        return text if self.operand is None else f"{text} ({self.operand.name})"
+
+
+class AnyOf:
+    """Passes if any of its checks passes; INFO if none of them could be evaluated"""
+    __slots__ = ("checks", "label")
+
+    def __init__(self, checks):
+        self.checks = checks
+        self.label = " or ".join(check.label for check in checks)
+
+    def evaluate(self, own, values):
+        failed = False
+        for check in self.checks:
+            code, _ = check.evaluate(own, values)
+            if code == PASS:
+                return PASS, ""
+            failed = failed or code == FAIL
+        return (FAIL, self.violation_text(False)) if failed else (INFO, "")
+
+    def violation_text(self, below):
+        return f"none of: {self.label}"
+
+
+class Condition:
+    """min <= operand < max; the standard only applies while it holds"""
+    __slots__ = ("operand", "lo", "hi", "label")
+
+    def __init__(self, operand, lo, hi):
+        self.operand = operand
+        self.lo = lo
+        self.hi = hi
+        if lo is not None and hi is None:
+            self.label = f"{operand.name} >= {lo}"
+        elif hi is not None and lo is None:
+            self.label = f"{operand.name} < {hi}"
+        else:
+            self.label = f"{operand.name} {range_label(lo, hi)}"
+
+    def holds(self, own, values):
+        """True/False, or None if the operand was not measured"""
+        x = self.operand.value(own, values)
+        if x is None:
+            return None
+        return (self.lo is None or x >= self.lo) and (self.hi is None or x < self.hi)
+
+
+class Rule:
+    """One compiled standard: conditions, then a check"""
+    __slots__ = ("std", "conditions", "check", "label")
+
+    def __init__(self, std, conditions, check):
+        self.std = std
+        self.conditions = conditions
+        self.check = check
+        self.label = check.label
+        if conditions:
+            self.label += " when " + " and ".join(cond.label for cond in conditions)
+
+    def evaluate(self, own, values):
+        """(status code, violation text); code None when a condition does not hold.
+
+        own is the measured value of the standard's parameter, values maps
+        every measured parameter of the sample to its value.
+        """
+        for cond in self.conditions:
+            holds = cond.holds(own, values)
+            if holds is None:
+                return INFO, ""
+            if not holds:
+                return None, ""
+        return self.check.evaluate(own, values)
+
+    def violation_text(self, below):
+        return self.check.violation_text(below)
+
+
+# --- COMPILER ---
+def _number(spec, key):
+    value = spec.get(key)
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+        raise ValueError(f"non-numeric {key} {value!r}")
+    return value
+
+
+def _operand(spec, own=True):
+    parameter, ratio_to = spec.get("parameter"), spec.get("ratio_to")
+    for key, name in (("parameter", parameter), ("ratio_to", ratio_to)):
+        if name is not None and not isinstance(name, str):
+            raise ValueError(f"'{key}' must be a parameter name")
+    if not own and parameter is None:
+        raise ValueError("a condition needs a 'parameter'")
+    if parameter is None and ratio_to is None:
+        return None     # the plain case: the standard's own value
+    return Operand(parameter, ratio_to)
+
+
+def _check(spec, min_key="min_limit", max_key="max_limit"):
+    lo, hi = _number(spec, min_key), _number(spec, max_key)
+    if lo is not None and hi is not None and lo > hi:
+        raise ValueError(f"{min_key} above {max_key}")
+    return lo, hi
+
+
+def compile_rule(std):
+    """Rule for one standard dict; raises ValueError on a malformed rule"""
+    if is_plain(std):
+        return Rule(std, (), Check(None, _number(std, "min_limit"), _number(std, "max_limit")))
+    when = std.get("when", [])
+    if isinstance(when, dict):
+        when = [when]
+    if not isinstance(when, list) or not all(isinstance(c, dict) for c in when):
+        raise ValueError("'when' must be a condition or a list of conditions")
+    conditions = tuple(Condition(_operand(c, own=False), *_check(c, "min", "max")) for c in when)
+
+    if "any_of" in std:
+        checks = std["any_of"]
+        if not isinstance(checks, list) or not checks or not all(isinstance(c, dict) for c in checks):
+            raise ValueError("'any_of' must be a non-empty list of checks")
+        check = AnyOf(tuple(Check(_operand(c), *_check(c)) for c in checks))
+    else:
+        if "parameter" in std:
+            raise ValueError("'parameter' is only allowed inside 'when' and 'any_of'")
+        check = Check(_operand(std), *_check(std))
+    return Rule(std, conditions, check)
+
+
+def referenced_parameters(rule):
+    """Names of the other parameters a rule reads"""
+    operands = [cond.operand for cond in rule.conditions]
+    checks = rule.check.checks if isinstance(rule.check, AnyOf) else (rule.check,)
+    operands += [check.operand for check in checks]
+    names = set()
+    for operand in operands:
+        if operand is not None:
+            names.update(n for n in (operand.parameter, operand.ratio_to) if n)
+    return names
+
+
+def limit_label(std):
+    """Limit as shown in reports, e.g. "6.5-8.5", "Max 5.0" or a rule's description"""
+    if is_plain(std):
+        return range_label(std.get("min_limit"), std.get("max_limit"))
+    try:
+        return compile_rule(std).label
+    except ValueError:
+        return "Invalid rule"
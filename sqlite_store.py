@@ -0,0 +1,244 @@
+"""SQLite storage backend for the standards catalog.
+
+Keeps several authorities and their revisions in one indexed database
+instead of a flat JSON list. Point the app at it with
+WATERCHECK_DB=standards.sqlite; load_data(), get_parameter_names() and
+analyze_batch() behave exactly as with database.json.
+
+    python sqlite_store.py import database.json standards.sqlite
+    python sqlite_store.py export standards.sqlite database.json
+    python sqlite_store.py query standards.sqlite --authority "WHO Guidelines"
+
+Limits are stored in untyped columns so 500 and 500.0 round-trip
+unchanged, and a bitmask records whether min_limit/max_limit keys were
+present at all. Any other keys survive as JSON in the extra columns.
+"""
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+HAS_MIN, HAS_MAX = 1, 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS parameters (
+    pk       INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL,
+    id       TEXT,
+    name     TEXT NOT NULL,
+    unit     TEXT,
+    extra    TEXT
+);
+CREATE TABLE IF NOT EXISTS standards (
+    pk          INTEGER PRIMARY KEY,
+    param_pk    INTEGER NOT NULL REFERENCES parameters(pk) ON DELETE CASCADE,
+    position    INTEGER NOT NULL,
+    authority   TEXT NOT NULL,
+    version     TEXT,
+    min_limit,
+    max_limit,
+    limit_keys  INTEGER NOT NULL DEFAULT 0,
+    consequence TEXT,
+    solution    TEXT,
+    extra       TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_parameters_name ON parameters(name);
+CREATE INDEX IF NOT EXISTS ix_parameters_id ON parameters(id);
+CREATE INDEX IF NOT EXISTS ix_parameters_position ON parameters(position);
+CREATE INDEX IF NOT EXISTS ix_standards_param ON standards(param_pk, position);
+CREATE INDEX IF NOT EXISTS ix_standards_authority ON standards(authority, version);
+"""
+
+_PARAM_KEYS = ("id", "name", "unit", "standards")
+_STD_KEYS = ("authority", "min_limit", "max_limit", "consequence", "solution")
+_VERSION_RE = re.compile(r"[:\s](\d{4})$")
+
+
+def is_sqlite_path(path):
+    return str(path).lower().endswith(SQLITE_SUFFIXES)
+
+
+def authority_version(std):
+    """Revision of a standard: an explicit "version" key, else a trailing year ("NIS 554:2015")"""
+    if std.get("version") is not None:
+        return str(std["version"])
+    m = _VERSION_RE.search(std.get("authority", ""))
+    return m.group(1) if m else None
+
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _extra(obj, known):
+    extra = {k: v for k, v in obj.items() if k not in known}
+    return json.dumps(extra, ensure_ascii=False) if extra else None
+
+
+# --- IMPORT / EXPORT ---
+def save_data(conn, data):
+    """Replace the catalog with a list in the database.json schema"""
+    with conn:
+        conn.execute("DELETE FROM standards")
+        conn.execute("DELETE FROM parameters")
+        for pos, item in enumerate(data):
+            cur = conn.execute(
+                "INSERT INTO parameters (position, id, name, unit, extra) VALUES (?, ?, ?, ?, ?)",
+                (pos, item.get("id"), item["name"], item.get("unit"), _extra(item, _PARAM_KEYS)))
+            param_pk = cur.lastrowid
+            conn.executemany(
+                "INSERT INTO standards (param_pk, position, authority, version, min_limit, max_limit,"
+                " limit_keys, consequence, solution, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(param_pk, spos, std["authority"], authority_version(std),
+                  std.get("min_limit"), std.get("max_limit"),
+                  (HAS_MIN if "min_limit" in std else 0) | (HAS_MAX if "max_limit" in std else 0),
+                  std.get("consequence"), std.get("solution"), _extra(std, _STD_KEYS))
+                 for spos, std in enumerate(item.get("standards", []))])
+
+
+def _standard_dict(row):
+    authority, min_limit, max_limit, limit_keys, consequence, solution, extra = row
+    std = {"authority": authority}
+    if limit_keys & HAS_MAX:
+        std["max_limit"] = max_limit
+    if limit_keys & HAS_MIN:
+        std["min_limit"] = min_limit
+    if consequence is not None:
+        std["consequence"] = consequence
+    if solution is not None:
+        std["solution"] = solution
+    if extra:
+        std.update(json.loads(extra))
+    return std
+
+
+_STD_COLUMNS = "s.authority, s.min_limit, s.max_limit, s.limit_keys, s.consequence, s.solution, s.extra"
+
+
+def load_data(conn):
+    """Whole catalog as a list in the database.json schema"""
+    data = []
+    by_pk = {}
+    for pk, pid, name, unit, extra in conn.execute(
+            "SELECT pk, id, name, unit, extra FROM parameters ORDER BY position"):
+        item = {"id": pid, "name": name, "unit": unit} if pid is not None else {"name": name, "unit": unit}
+        item["standards"] = []
+        if extra:
+            item.update(json.loads(extra))
+        by_pk[pk] = item
+        data.append(item)
+    for row in conn.execute(
+            f"SELECT s.param_pk, {_STD_COLUMNS} FROM standards s ORDER BY s.param_pk, s.position"):
+        by_pk[row[0]]["standards"].append(_standard_dict(row[1:]))
+    return data
+
+
+def load(path):
+    """(version, data) for StandardsRegistry; version hashes the loaded catalog"""
+    conn = connect(path)
+    try:
+        data = load_data(conn)
+    finally:
+        conn.close()
+    canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16], data
+
+
+def import_json(json_path, db_path):
+    with open(json_path, "rb") as f:
+        data = json.loads(f.read())
+    conn = connect(db_path)
+    try:
+        save_data(conn, data)
+    finally:
+        conn.close()
+    return len(data)
+
+
+def export_json(db_path, json_path):
+    conn = connect(db_path)
+    try:
+        data = load_data(conn)
+    finally:
+        conn.close()
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    return len(data)
+
+
+# --- INDEXED QUERIES ---
+def find_parameter(conn, name=None, param_id=None):
+    """One parameter dict by name or id, via the indexes"""
+    column, value = ("name", name) if name is not None else ("id", param_id)
+    row = conn.execute(f"SELECT pk, id, name, unit, extra FROM parameters WHERE {column} = ? "
+                       "ORDER BY position LIMIT 1", (value,)).fetchone()
+    if row is None:
+        return None
+    pk, pid, pname, unit, extra = row
+    item = {"id": pid, "name": pname, "unit": unit} if pid is not None else {"name": pname, "unit": unit}
+    item["standards"] = [_standard_dict(r) for r in conn.execute(
+        f"SELECT {_STD_COLUMNS} FROM standards s WHERE s.param_pk = ? ORDER BY s.position", (pk,))]
+    if extra:
+        item.update(json.loads(extra))
+    return item
+
+
+def standards_for(conn, authority, version=None):
+    """[(parameter name, standard dict)] for one authority, optionally one revision"""
+    sql = (f"SELECT p.name, {_STD_COLUMNS} FROM standards s JOIN parameters p ON p.pk = s.param_pk "
+           "WHERE s.authority = ?")
+    args = [authority]
+    if version is not None:
+        sql += " AND s.version = ?"
+        args.append(str(version))
+    sql += " ORDER BY p.position, s.position"
+    return [(row[0], _standard_dict(row[1:])) for row in conn.execute(sql, args)]
+
+
+def authorities(conn):
+    """[(authority, version, number of parameters)] in the catalog"""
+    return conn.execute("SELECT authority, version, COUNT(*) FROM standards "
+                        "GROUP BY authority, version ORDER BY authority, version").fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the SQLite standards store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("import", help="load a database.json into a SQLite store")
+    p.add_argument("json_path")
+    p.add_argument("db_path")
+    p = sub.add_parser("export", help="write a SQLite store back to the JSON schema")
+    p.add_argument("db_path")
+    p.add_argument("json_path")
+    p = sub.add_parser("query", help="list authorities, or one authority's limits")
+    p.add_argument("db_path")
+    p.add_argument("--authority")
+    p.add_argument("--version")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        print(f"imported {import_json(args.json_path, args.db_path)} parameters", file=sys.stderr)
+    elif args.command == "export":
+        print(f"exported {export_json(args.db_path, args.json_path)} parameters", file=sys.stderr)
+    else:
+        conn = connect(args.db_path)
+        try:
+            if args.authority:
+                for name, std in standards_for(conn, args.authority, args.version):
+                    print(f"{name}: min={std.get('min_limit')} max={std.get('max_limit')}")
+            else:
+                for authority, version, count in authorities(conn):
+                    print(f"{authority} (version {version or '-'}): {count} parameters")
+        finally:
+            conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+"""Scenario sweeps for the design proposal.
+
+generate_proposal() projects one growth rate and design period. sweep()
+evaluates a whole grid of growth rates x design periods x per-capita
+demands in one NumPy pass, with the same formulas and rounding, and
+sweep_pdf() lays the grid out as compact comparison tables plus a chart
+page instead of one proposal per combination.
+
+    python sweep.py --pop 250000 --type "City (Geometric)" \\
+        --rates 1:5:0.25 --periods 10:30:5 --per-capita 60,120 -o sweep.pdf
+"""
+import argparse
+import datetime
+import sys
+
+import numpy as np
+
+from logic import CITY_PER_CAPITA, PEAK_FACTOR, VILLAGE_PER_CAPITA, pdf_to_bytes, sanitize
+from profiling import span, timed
+
+GEOMETRIC = "City (Geometric)"
+MAX_SCENARIOS = 5_000_000
+MAX_JSON_SCENARIOS = 50_000   # rows() builds one dict per scenario; larger grids go out as PDF
+INT64_LIMIT = 2 ** 63      # populations are int64 arrays
+MAX_TABLE_ROWS = 24        # growth rates shown per table; the grid itself is not thinned
+MAX_TABLE_COLS = 8
+MAX_CHART_LINES = 6
+CHART_COLORS = ((31, 119, 180), (255, 127, 14), (44, 160, 44), (214, 39, 40), (148, 103, 189), (140, 86, 75))
+
+
+# --- GRID ---
+class Sweep:
+    """Projection grid: population is (rates, periods), q_avg/q_max are (rates, periods, per_capita) in L/day"""
+
+    def __init__(self, inputs, growth_rates, design_periods, per_capita, population):
+        self.inputs = inputs
+        self.growth_rates = growth_rates
+        self.design_periods = design_periods
+        self.per_capita = per_capita
+        self.population = population
+        self.q_avg = population[:, :, None] * per_capita[None, None, :]
+        self.q_max = self.q_avg * PEAK_FACTOR
+
+    @property
+    def shape(self):
+        return self.q_max.shape
+
+    def rows(self):
+        """One dict per combination, rates varying slowest"""
+        r, y, c = np.indices(self.shape).reshape(3, -1)
+        return [
+            {"growth_rate": float(self.growth_rates[i]), "design_period": int(self.design_periods[j]),
+             "per_capita": float(self.per_capita[k]), "population": int(self.population[i, j]),
+             "q_avg": float(self.q_avg[i, j, k]), "q_max": float(self.q_max[i, j, k])}
+            for i, j, k in zip(r.tolist(), y.tolist(), c.tolist())
+        ]
+
+
+def _to_int64(x):
+    """Truncated float array as int64; ValueError instead of a silent wrap-around"""
+    x = np.trunc(x)
+    if not np.isfinite(x).all() or np.abs(x).max() >= INT64_LIMIT:
+        raise ValueError("projected population is outside the supported range")
+    return x.astype(np.int64)
+
+
+def project_population(p_current, growth_rates, design_periods, geometric):
+    """Future population for every (rate, period) pair, truncated like generate_proposal()"""
+    rates = np.asarray(growth_rates, dtype=np.float64)[:, None]
+    years = np.asarray(design_periods, dtype=np.int64)[None, :]
+    if geometric:
+        with np.errstate(over="ignore", invalid="ignore"):
+            return _to_int64(p_current * (1 + rates / 100) ** years)
+    yearly_increase = _to_int64((rates / 100) * p_current)
+    # exact bound in Python ints, so the int64 sum below cannot overflow
+    if abs(p_current) + int(np.abs(years).max()) * int(np.abs(yearly_increase).max()) >= INT64_LIMIT:
+        raise ValueError("projected population is outside the supported range")
+    return p_current + years * yearly_increase
+
+
+@timed("sweep")
+def sweep(inputs, growth_rates=None, design_periods=None, per_capita=None, limit=MAX_SCENARIOS):
+    """Evaluate the proposal inputs over every combination of the given axes.
+
+    Axes left as None fall back to the single value in inputs (or the
+    community type's per-capita demand). More than limit combinations
+    raise ValueError.
+    """
+    geometric = inputs['type'] == GEOMETRIC
+    if growth_rates is None:
+        growth_rates = [inputs['growth_rate']]
+    if design_periods is None:
+        design_periods = [inputs['design_period']]
+    if per_capita is None:
+        per_capita = [CITY_PER_CAPITA if geometric else VILLAGE_PER_CAPITA]
+
+    rates = np.asarray(growth_rates, dtype=np.float64).ravel()
+    periods = np.asarray(design_periods, dtype=np.int64).ravel()
+    demands = np.asarray(per_capita, dtype=np.float64).ravel()
+    if not (rates.size and periods.size and demands.size):
+        raise ValueError("growth_rates, design_periods and per_capita must not be empty")
+    if rates.size * periods.size * demands.size > limit:
+        raise ValueError(f"sweep is limited to {limit:,} scenarios")
+    population = project_population(int(inputs['pop_current']), rates, periods, geometric)
+    return Sweep(inputs, rates, periods, demands, population)
+
+
+# --- PDF ---
+def _pick(n, k):
+    """Up to k evenly spaced indexes into range(n), always keeping both ends"""
+    return np.unique(np.linspace(0, n - 1, min(n, k)).round().astype(np.int64)).tolist()
+
+
+def _fmt(x):
+    return f"{x:g}"
+
+
+def _table(pdf, title, result, values, fmt):
+    """Rates down, design periods across; the header row repeats after a page break"""
+    rows = _pick(len(result.growth_rates), MAX_TABLE_ROWS)
+    cols = _pick(len(result.design_periods), MAX_TABLE_COLS)
+    first_w = 26
+    cell_w = min(30, (pdf.w - pdf.l_margin - pdf.r_margin - first_w) / len(cols))
+
+    def header():
+        pdf.set_font("Arial", 'B', 9)
+        pdf.set_fill_color(220, 230, 241)
+        pdf.cell(first_w, 6, "Rate % \\ Years", 1, 0, 'C', 1)
+        for j in cols:
+            pdf.cell(cell_w, 6, str(int(result.design_periods[j])), 1, 0, 'C', 1)
+        pdf.ln()
+        pdf.set_font("Arial", '', 9)
+
+    if pdf.get_y() > pdf.page_break_trigger - 30:
+        pdf.add_page()
+    pdf.set_font("Arial", 'B', 11)
+    pdf.cell(0, 8, sanitize(title), ln=True)
+    header()
+    for i in rows:
+        if pdf.get_y() + 6 > pdf.page_break_trigger:
+            pdf.add_page()
+            header()
+        pdf.cell(first_w, 6, _fmt(result.growth_rates[i]), 1, 0, 'C')
+        for j in cols:
+            pdf.cell(cell_w, 6, fmt(values[i, j]), 1, 0, 'R')
+        pdf.ln()
+    pdf.ln(4)
+
+
+def _chart(pdf, title, result, k, x0, y0, w, h):
+    """Q_max against design period, one line per representative growth rate"""
+    periods = result.design_periods.astype(np.float64)
+    q = result.q_max[:, :, k] / 1e6
+    x_lo, x_hi = periods.min(), periods.max()
+    if x_hi == x_lo:
+        x_lo, x_hi = x_lo - 1, x_hi + 1
+    y_lo, y_hi = 0.0, float(q.max()) * 1.05 or 1.0
+
+    def px(x):
+        return x0 + (x - x_lo) / (x_hi - x_lo) * w
+
+    def py(y):
+        return y0 + h - (y - y_lo) / (y_hi - y_lo) * h
+
+    pdf.set_font("Arial", 'B', 10)
+    pdf.set_xy(x0, y0 - 8)
+    pdf.cell(w, 6, sanitize(title), 0, 0, 'C')
+
+    pdf.set_draw_color(0, 0, 0)
+    pdf.set_line_width(0.2)
+    pdf.line(x0, y0 + h, x0 + w, y0 + h)
+    pdf.line(x0, y0, x0, y0 + h)
+    pdf.set_font("Arial", '', 7)
+    for t in np.linspace(y_lo, y_hi, 5):
+        pdf.line(x0 - 1, py(t), x0, py(t))
+        pdf.set_xy(x0 - 16, py(t) - 2)
+        pdf.cell(14, 4, f"{t:.3g}", 0, 0, 'R')
+    for x in periods[_pick(len(periods), 8)]:
+        pdf.line(px(x), y0 + h, px(x), y0 + h + 1)
+        pdf.set_xy(px(x) - 6, y0 + h + 1)
+        pdf.cell(12, 4, _fmt(x), 0, 0, 'C')
+    pdf.set_xy(x0, y0 + h + 5)
+    pdf.cell(w, 4, "Design period (years)", 0, 0, 'C')
+    pdf.set_xy(x0 - 16, y0 - 4)
+    pdf.cell(30, 4, "Q_max (ML/day)", 0, 0, 'L')
+
+    pdf.set_line_width(0.5)
+    legend_y = y0 + 2
+    for n, i in enumerate(_pick(len(result.growth_rates), MAX_CHART_LINES)):
+        color = CHART_COLORS[n % len(CHART_COLORS)]
+        pdf.set_draw_color(*color)
+        pts = [(px(x), py(y)) for x, y in zip(periods, q[i])]
+        for (xa, ya), (xb, yb) in zip(pts, pts[1:]):
+            pdf.line(xa, ya, xb, yb)
+        if len(pts) == 1:
+            pdf.line(pts[0][0] - 1, pts[0][1], pts[0][0] + 1, pts[0][1])
+        pdf.line(x0 + w - 30, legend_y + 2, x0 + w - 24, legend_y + 2)
+        pdf.set_xy(x0 + w - 23, legend_y)
+        pdf.cell(23, 4, f"{_fmt(result.growth_rates[i])}%/yr", 0, 0, 'L')
+        legend_y += 4
+    pdf.set_draw_color(0, 0, 0)
+    pdf.set_line_width(0.2)
+
+
+@timed("sweep_pdf")
+def sweep_pdf(result, as_bytes=False):
+    """Comparison tables and chart page for a Sweep; returns bytes if as_bytes, else the filename"""
+    from fpdf import FPDF
+    inputs = result.inputs
+    pdf = FPDF()
+    pdf.add_page()
+
+    pdf.set_font("Arial", 'B', 18)
+    pdf.cell(0, 12, "DESIGN SENSITIVITY STUDY", ln=True, align='C')
+    pdf.set_font("Arial", 'B', 11)
+    pdf.cell(0, 7, f"PROJECT: {sanitize(inputs['name'])}", ln=True)
+    pdf.cell(0, 7, f"SOURCE: {sanitize(inputs['source'])}", ln=True)
+    pdf.cell(0, 7, f"DATE: {datetime.date.today()}", ln=True)
+    pdf.set_font("Arial", '', 10)
+    method = "Geometric" if inputs['type'] == GEOMETRIC else "Arithmetic"
+    rates, periods = result.growth_rates, result.design_periods
+    pdf.multi_cell(0, 5, sanitize(
+        f"{method} projection from {int(inputs['pop_current']):,} people over "
+        f"{len(rates)} growth rates ({_fmt(rates.min())}-{_fmt(rates.max())} %/yr) x "
+        f"{len(periods)} design periods ({periods.min()}-{periods.max()} years) x "
+        f"{len(result.per_capita)} per-capita demands, {result.q_max.size:,} scenarios. "
+        f"Q_avg = Population x Per Capita; Q_max = Q_avg x {PEAK_FACTOR}. "
+        f"Design capacity ranges from {result.q_max.min():,.0f} to {result.q_max.max():,.0f} Liters/day."))
+    if len(rates) > MAX_TABLE_ROWS or len(periods) > MAX_TABLE_COLS:
+        pdf.set_font("Arial", 'I', 9)
+        pdf.multi_cell(0, 5, "Tables show evenly spaced rows/columns of the full grid; the first and last are always included.")
+    pdf.ln(4)
+
+    with span("sweep_pdf.tables"):
+        _table(pdf, "Future population (people)", result, result.population, lambda v: f"{v:,}")
+        for k, pc in enumerate(result.per_capita):
+            _table(pdf, f"Q_max (ML/day) at {_fmt(pc)} L/person/day", result, result.q_max[:, :, k] / 1e6,
+                   lambda v: f"{v:,.3f}")
+
+    with span("sweep_pdf.charts"):
+        charts = [(k, pc) for k, pc in enumerate(result.per_capita)]
+        for n, (k, pc) in enumerate(charts):
+            if n % 2 == 0:
+                pdf.add_page()
+            y0 = 30 if n % 2 == 0 else 160
+            _chart(pdf, f"Q_max at {_fmt(pc)} L/person/day", result, k, 35, y0, 150, 95)
+
+    if as_bytes:
+        return pdf_to_bytes(pdf)
+
+    filename = f"Sweep_{inputs['name'].replace(' ', '_')}.pdf"
+    with span("pdf.output"):
+        pdf.output(filename)
+    return filename
+
+
+# --- CLI ---
+def parse_axis(spec, cast=float):
+    """"1,2.5,4" or an inclusive "start:stop:step" range"""
+    if ":" in spec:
+        start, stop, step = (float(x) for x in spec.split(":"))
+        if step <= 0:
+            raise argparse.ArgumentTypeError(f"step must be positive in {spec!r}")
+        values = np.arange(start, stop + step / 2, step)
+        return [cast(round(v, 10)) for v in values]
+    return [cast(x) for x in spec.split(",") if x.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep proposal projections over growth rates and design periods.")
+    parser.add_argument("--name", default="Sensitivity Study")
+    parser.add_argument("--source", default="River")
+    parser.add_argument("--type", default=GEOMETRIC, choices=[GEOMETRIC, "Village (Arithmetic)"])
+    parser.add_argument("--pop", type=int, required=True, help="current population")
+    parser.add_argument("--rates", required=True, type=parse_axis, help="growth rates %%, '1,2,3' or '1:5:0.25'")
+    parser.add_argument("--periods", required=True, type=lambda s: parse_axis(s, int), help="design periods in years")
+    parser.add_argument("--per-capita", type=parse_axis, help="L/person/day (default: by community type)")
+    parser.add_argument("-o", "--output", help="PDF path (default: Sweep_<name>.pdf)")
+    args = parser.parse_args(argv)
+
+    inputs = {"name": args.name, "source": args.source, "type": args.type, "pop_current": args.pop}
+    result = sweep(inputs, args.rates, args.periods, args.per_capita)
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(sweep_pdf(result, as_bytes=True))
+        out = args.output
+    else:
+        out = sweep_pdf(result)
+    print(f"{result.q_max.size} scenarios -> {out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import logic  # noqa: E402
+
+DB_FILE = os.path.join(ROOT, "database.json")
+
+
+def shipped_db():
+    with open(DB_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _rule(authority, **rule):
+    return {"authority": authority, "consequence": f"{authority} risk.", "solution": f"{authority} fix.", **rule}
+
+
+def rules_db():
+    """The shipped DB plus one standard of every rule kind rules.py supports"""
+    data = shipped_db()
+    by_name = {item["name"]: item for item in data}
+    by_name["Total Dissolved Solids (TDS)"]["standards"].append(
+        _rule("Ratio Check", ratio_to="Conductivity", max_limit=0.8))
+    by_name["Turbidity"]["standards"].append(
+        _rule("Conditional", when={"parameter": "pH Level", "min": 7, "max": 8}, max_limit=0.5))
+    by_name["Iron (Fe)"]["standards"].append(
+        _rule("Conditional", when=[{"parameter": "pH Level", "min": 6}, {"parameter": "Manganese (Mn)", "max": 0.4}],
+              min_limit=0.01, max_limit=0.3))
+    by_name["E. Coli"]["standards"].append(
+        _rule("Either", any_of=[{"max_limit": 0}, {"parameter": "Total Coliforms", "max_limit": 0}]))
+    by_name["Sulfate (SO4)"]["standards"].append(
+        _rule("Either", any_of=[{"max_limit": 250}, {"parameter": "Total Hardness (CaCO3)", "ratio_to": "Conductivity",
+                                                     "min_limit": 0.2}]))
+    return data
+
+
+@pytest.fixture
+def use_db(tmp_path):
+    """Point the shared registry at a standards list written to a temporary database.json"""
+    saved = logic.registry.path
+
+    def use(data):
+        path = tmp_path / "database.json"
+        path.write_text(json.dumps(data), encoding="utf-8")
+        logic.registry.path = str(path)
+        logic.registry.invalidate()
+        return str(path)
+
+    yield use
+    logic.registry.path = saved
+    logic.registry.invalidate()
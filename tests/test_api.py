@@ -0,0 +1,67 @@
+import pytest
+
+import api
+from conftest import shipped_db
+
+PROPOSAL = {"name": "Test Scheme", "source": "River", "type": "City (Geometric)",
+            "pop_current": 5000, "growth_rate": 3.0, "design_period": 20}
+
+
+@pytest.mark.parametrize("value", ["nan", "inf", "-inf", float("nan")])
+def test_non_finite_values_are_rejected(use_db, value):
+    use_db(shipped_db())
+    batch = [{"name": "pH Level", "value": value}]
+    with pytest.raises(api.BadRequest):
+        api.handle_analyze({"batch": batch})
+    with pytest.raises(api.BadRequest):
+        api.handle_analyze({"samples": [{"sample_id": "S1", "batch": batch}]})
+
+
+@pytest.mark.parametrize("field", ["name", "source", "type"])
+def test_proposal_text_fields_must_be_strings(field):
+    with pytest.raises(api.BadRequest):
+        api.handle_proposal(dict(PROPOSAL, **{field: 1}))
+
+
+def test_proposal_growth_rate_must_be_finite():
+    with pytest.raises(api.BadRequest):
+        api.handle_proposal(dict(PROPOSAL, growth_rate="nan"))
+
+@pytest.mark.parametrize("fields", [{"design_period": 100000}, {"pop_current": 1e400},
+                                    {"pop_current": 10 ** 400}, {"design_period": 10 ** 30},
+                                    {"type": "Village (Arithmetic)", "design_period": 10 ** 18}])
+def test_proposal_out_of_range_inputs_are_rejected(fields):
+    with pytest.raises(api.BadRequest):
+        api.handle_proposal(dict(PROPOSAL, **fields))
+
+
+def test_sweep_huge_population_is_rejected():
+    with pytest.raises(api.BadRequest):
+        api.handle_sweep(dict(PROPOSAL, pop_current=1e400, growth_rates=[3.0], design_periods=[20]))
+
+
+@pytest.mark.parametrize("route", [api.handle_analyze, api.handle_report])
+def test_unknown_authority_is_rejected(use_db, route):
+    use_db(shipped_db())
+    with pytest.raises(api.BadRequest, match="unknown authorities"):
+        route({"batch": [{"name": "pH Level", "value": 13}], "authorities": ["WHO Guideline"]})
+
+
+def test_empty_authorities_mean_all(use_db):
+    use_db(shipped_db())
+    batch = [{"name": "pH Level", "value": 13}]
+    everything = api.handle_analyze({"batch": batch})
+    assert everything["summary"]["unsafe"] == 1
+    assert api.handle_analyze({"batch": batch, "authorities": []}) == everything
+    samples = api.handle_analyze({"samples": [{"batch": batch}], "authorities": []})
+    assert samples["samples"][0]["results"] == everything["results"]
+
+
+def test_json_sweep_is_capped():
+    rates = [r / 100 for r in range(1000)]
+    periods = list(range(1, 101))
+    payload = dict(PROPOSAL, growth_rates=rates, design_periods=periods, format="json")
+    with pytest.raises(api.BadRequest, match="50,000"):
+        api.handle_sweep(payload)
+    assert api.handle_sweep(dict(payload, growth_rates=rates[:10]))["scenarios"][0]["growth_rate"] == 0.0
+    assert api.handle_sweep(dict(payload, format="pdf"))[:4] == b"%PDF"
@@ -0,0 +1,61 @@
+import datetime
+
+import pytest
+
+import cache
+import result_store
+from conftest import shipped_db
+
+PROPOSAL = {"name": "Test Scheme", "source": "Borehole", "type": "Village (Arithmetic)",
+            "pop_current": 2000, "growth_rate": 2.5, "design_period": 15}
+BATCH = [{"name": "pH Level", "value": 7.2}, {"name": "Turbidity", "value": 3.0}]
+
+
+class FakeDate(datetime.date):
+    day = datetime.date(2026, 1, 1)
+
+    @classmethod
+    def today(cls):
+        return cls.day
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Empty memory caches, a fresh on-disk store and a controllable date"""
+    monkeypatch.setattr(result_store, "store", result_store.ResultStore(str(tmp_path / "store")))
+    monkeypatch.setattr(cache.datetime, "date", FakeDate)
+    monkeypatch.setattr(FakeDate, "day", datetime.date(2026, 1, 1))
+    cache._reports.clear()
+    yield result_store.store
+    cache._reports.clear()
+
+
+def count_calls(monkeypatch, name):
+    calls = []
+    render = getattr(cache, name)
+    monkeypatch.setattr(cache, name, lambda *args, **kwargs: calls.append(1) or render(*args, **kwargs))
+    return calls
+
+
+def test_stored_proposal_is_rendered_again_on_a_new_day(store, monkeypatch):
+    calls = count_calls(monkeypatch, "generate_proposal")
+    cache.cached_proposal(PROPOSAL)
+    cache._reports.clear()   # a restarted worker: only the disk store is warm
+    cache.cached_proposal(PROPOSAL)
+    assert len(calls) == 1
+    FakeDate.day = datetime.date(2026, 1, 2)
+    cache.cached_proposal(PROPOSAL)
+    assert len(calls) == 2
+
+
+def test_stored_report_pdf_is_rendered_again_on_a_new_day(store, monkeypatch, use_db):
+    use_db(shipped_db())
+    calls = count_calls(monkeypatch, "save_comprehensive_pdf")
+    cache.cached_pdf(BATCH)
+    cache.cached_pdf(BATCH)
+    cache._reports.clear()
+    cache.cached_pdf(BATCH)
+    assert len(calls) == 1
+    FakeDate.day = datetime.date(2026, 1, 2)
+    cache.cached_pdf(BATCH)
+    assert len(calls) == 2
@@ -0,0 +1,28 @@
+import io
+import json
+
+import pytest
+
+import cli
+from conftest import DB_FILE
+
+CSV = """sample_id,parameter,value
+A,pH Level,nan
+A,Turbidity,inf
+A,Conductivity,-inf
+B,pH Level,13
+B,Turbidity,n/a
+"""
+
+
+def test_non_finite_readings_are_skipped():
+    out = io.StringIO()
+    stats = cli.run(io.StringIO(CSV), out, db_path=DB_FILE)
+    assert stats == {"rows": 5, "skipped": 4, "samples": 1, "unsafe_samples": 1}
+    record = json.loads(out.getvalue())
+    assert (record["sample_id"], record["total"], record["unsafe"]) == ("B", 1, 1)
+
+
+def test_unknown_authority_is_rejected():
+    with pytest.raises(ValueError, match="WHO Guideline"):
+        cli.run(io.StringIO(CSV), io.StringIO(), db_path=DB_FILE, authorities=["WHO Guideline"])
@@ -0,0 +1,16 @@
+import json
+
+import compiled_db
+from conftest import rules_db, shipped_db
+
+
+def test_artifact_round_trip(tmp_path):
+    for data in (shipped_db(), rules_db()):
+        path = tmp_path / "database.json"
+        raw = json.dumps(data).encode("utf-8")
+        path.write_bytes(raw)
+        table = compiled_db.StandardsTable.load(compiled_db.compile_db(str(path)))
+        assert table.to_list() == data
+        assert table.version == compiled_db.content_version(raw)
+        assert list(table.sorted_names) == sorted(item["name"] for item in data)
+        assert table.name_index.keys() == {item["name"] for item in data}
@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+import compiled_db
+import engine
+from conftest import rules_db, shipped_db
+from logic import analyze_batch, plain_results, registry
+
+SELECTIONS = [None, ["WHO Guidelines"], ["NIS 554:2015", "Conditional"], ["Ratio Check", "Either"], []]
+
+
+def plain(results):
+    return plain_results(results, display=False)
+
+
+def summarize(results):
+    unsafe = sum(1 for res in results if any(s["status"] == "FAIL" for s in res["standards"]))
+    return {"total": len(results), "safe": len(results) - unsafe, "unsafe": unsafe}
+
+
+def test_replicate_readings_match_analyze_batch(use_db):
+    use_db(shipped_db())
+    batches = [
+        [{"name": "pH Level", "value": 7.0}, {"name": "Turbidity", "value": 3.0}, {"name": "pH Level", "value": 9.9}],
+        [{"name": "pH Level", "value": 9.9}, {"name": "pH Level", "value": 7.0}, {"name": "pH Level", "value": 4.0}],
+        [{"name": "Turbidity", "value": 0.5}, {"name": "Unknown", "value": 1.0}],
+    ]
+    ev = engine.evaluate_batches(batches)
+    for i, batch in enumerate(batches):
+        expected = analyze_batch(batch, mode="results")
+        assert plain(ev.results(i)) == plain(expected)
+        assert ev.summary(i) == summarize(expected)
+    first, _, last = ev.results(0)
+    assert (first["value"], first["standards"][0]["status"]) == ("7.0 Scale", "PASS")
+    assert (last["value"], last["standards"][0]["status"]) == ("9.9 Scale", "FAIL")
+
+
+def random_batches(data, n, seed):
+    """Batches of readings around each parameter's limits, with gaps, replicates and unknown names"""
+    rng = random.Random(seed)
+    limits = {item["name"]: [x for s in item["standards"] for x in (s.get("min_limit"), s.get("max_limit"))
+                             if x is not None] or [1.0] for item in data}
+    names = sorted(limits) + ["Unknown"]
+    batches = []
+    for _ in range(n):
+        batch = []
+        for name in rng.sample(names, rng.randint(0, len(names))):
+            centre = rng.choice(limits.get(name, [1.0]))
+            value = round(rng.uniform(0, 2 * centre + 1), rng.choice([0, 1, 3]))
+            batch.append({"name": name, "value": rng.choice([value, int(value), 0])})
+        if batch and rng.random() < 0.2:
+            batch.append(dict(rng.choice(batch), value=rng.uniform(0, 10)))
+        batches.append(batch)
+    return batches
+
+
+@pytest.mark.parametrize("compiled", [False, True], ids=["json", "wcdb"])
+def test_engine_matches_analyze_batch(use_db, compiled):
+    data = rules_db()
+    path = use_db(data)
+    if compiled:
+        compiled_db.compile_db(path)
+        registry.invalidate()
+        assert registry.snapshot().table is not None
+    batches = random_batches(data, 300, seed=1)
+    for authorities in SELECTIONS:
+        ev = engine.evaluate_batches(batches, authorities=authorities)
+        for i, batch in enumerate(batches):
+            expected = analyze_batch(batch, mode="results", authorities=authorities)
+            assert plain(ev.results(i)) == plain(expected), (authorities, batch)
+            assert ev.summary(i) == summarize(expected), (authorities, batch)
+
+
+def test_unknown_authority_is_rejected(use_db):
+    use_db(shipped_db())
+    batch = [{"name": "pH Level", "value": 13}]
+    with pytest.raises(ValueError):
+        analyze_batch(batch, authorities=["WHO Guideline"])
+    with pytest.raises(ValueError):
+        engine.evaluate_batches([batch], authorities=["WHO Guideline"])
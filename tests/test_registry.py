@@ -0,0 +1,65 @@
+import json
+import os
+
+import pytest
+
+import compiled_db
+from conftest import shipped_db
+from logic import StandardsRegistry
+
+BAD_RULE = {"authority": "WHO Guidelines", "when": {"min": 1}, "max_limit": 5,
+            "consequence": "-", "solution": "-"}
+
+
+def with_bad_rule():
+    data = shipped_db()
+    data[0]["standards"].append(BAD_RULE)
+    return data
+
+
+def write(path, data, mtime_ns=None):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_malformed_rule_is_rejected_on_first_load(tmp_path):
+    path = tmp_path / "database.json"
+    write(path, with_bad_rule())
+    registry = StandardsRegistry(str(path))
+    with pytest.raises(ValueError, match="needs a 'parameter'"):
+        registry.snapshot()
+    with pytest.raises(ValueError):
+        registry.watch(60)
+    assert registry.last_error
+
+
+def test_malformed_edit_keeps_the_loaded_db(tmp_path):
+    path = tmp_path / "database.json"
+    write(path, shipped_db(), 1_000_000_000)
+    registry = StandardsRegistry(str(path))
+    version = registry.snapshot().version
+    write(path, with_bad_rule(), 2_000_000_000)
+    assert registry.snapshot().version == version
+    assert registry.last_error
+    write(path, shipped_db()[:3], 3_000_000_000)
+    assert registry.snapshot().version != version
+    assert registry.last_error is None
+
+
+def test_missing_file_loads_as_empty(tmp_path):
+    assert StandardsRegistry(str(tmp_path / "database.json")).snapshot().names == ()
+
+
+def test_compile_db_rejects_malformed_rules(tmp_path):
+    path = tmp_path / "database.json"
+    write(path, with_bad_rule())
+    with pytest.raises(ValueError):
+        compiled_db.compile_db(str(path))
+    assert not os.path.exists(compiled_db.artifact_path(str(path)))
+
+
+def test_sqlite_suffixes_match_the_store():
+    import logic
+    import sqlite_store
+    assert logic.SQLITE_SUFFIXES == sqlite_store.SQLITE_SUFFIXES
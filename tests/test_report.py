@@ -0,0 +1,39 @@
+import datetime
+import re
+
+from conftest import rules_db
+from logic import analyze_batch, plain_results, save_comprehensive_pdf
+
+
+class FixedDatetime(datetime.datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2026, 1, 1, 12, 0)
+
+
+def without_dates(pdf_bytes):
+    """PDF bytes minus fpdf's /CreationDate, which has second resolution"""
+    return re.sub(rb"\(D:\d{14}\)", b"", pdf_bytes)
+
+
+def test_report_pdf_is_the_same_for_standard_results_and_plain_dicts(use_db, monkeypatch):
+    use_db(rules_db())
+    monkeypatch.setattr(datetime, "datetime", FixedDatetime)   # "Generated on" has minute resolution
+    batch = [{"name": "pH Level", "value": 9.1}, {"name": "Turbidity", "value": 0.8},
+             {"name": "Total Dissolved Solids (TDS)", "value": 900}, {"name": "Conductivity", "value": 1000}]
+    results = analyze_batch(batch, mode="results")
+    assert without_dates(save_comprehensive_pdf(results, as_bytes=True)) == \
+        without_dates(save_comprehensive_pdf(plain_results(results), as_bytes=True))
+
+
+def test_failing_rule_without_consequence_or_solution(use_db):
+    data = rules_db()
+    for item in data:
+        for std in item["standards"]:
+            std.pop("consequence", None)
+            std.pop("solution", None)
+    use_db(data)
+    batch = [{"name": "Total Dissolved Solids (TDS)", "value": 900}, {"name": "Conductivity", "value": 1000}]
+    gui_text, results = analyze_batch(batch)
+    assert ("NORMAL", "      Solution: Consult civil engineer.") in gui_text
+    assert save_comprehensive_pdf(results, as_bytes=True)[:4] == b"%PDF"
@@ -0,0 +1,63 @@
+import cache
+import logic
+import rules
+from conftest import rules_db
+from logic import analyze_batch, plain_results
+
+BATCH = [
+    {"name": "Total Dissolved Solids (TDS)", "value": 900.0},
+    {"name": "Conductivity", "value": 1000.0},
+    {"name": "Turbidity", "value": 0.8},
+    {"name": "pH Level", "value": 7.5},
+    {"name": "E. Coli", "value": 2.0},
+]
+
+
+def statuses(res):
+    return [(s["authority"], s["status"]) for s in res["standards"]]
+
+
+def test_items_are_checked_against_the_rest_of_the_batch(use_db):
+    use_db(rules_db())
+    batch = analyze_batch(BATCH, mode="results")
+    values = {x["name"]: x["value"] for x in BATCH}
+    for authorities in (None, ["Ratio Check", "Conditional"]):
+        expected = analyze_batch(BATCH, mode="results", authorities=authorities)
+        for item, res in zip(BATCH, expected):
+            context = cache.item_context(item["name"], values, authorities)
+            hit = cache.cached_item(item["name"], item["value"], authorities, context)
+            assert plain_results([hit]) == plain_results([res])
+    assert ("Ratio Check", "FAIL") in statuses(batch[0])
+    assert ("Conditional", "FAIL") in statuses(batch[2])
+
+
+def test_item_context_lists_only_rule_inputs(use_db):
+    use_db(rules_db())
+    values = {x["name"]: x["value"] for x in BATCH}
+    assert cache.item_context("pH Level", values) == ()
+    assert cache.item_context("Total Dissolved Solids (TDS)", values) == (("Conductivity", 1000.0),)
+    assert cache.item_context("E. Coli", values) == (("Total Coliforms", None),)
+    assert cache.item_context("Turbidity", values, ["NIS 554:2015"]) == ()
+
+
+def test_changed_rule_input_is_evaluated_again(use_db):
+    use_db(rules_db())
+    tds = "Total Dissolved Solids (TDS)"
+    low = cache.cached_item(tds, 900.0, None, cache.item_context(tds, {"Conductivity": 1000.0}))
+    high = cache.cached_item(tds, 900.0, None, cache.item_context(tds, {"Conductivity": 2000.0}))
+    assert ("Ratio Check", "FAIL") in statuses(low)
+    assert ("Ratio Check", "PASS") in statuses(high)
+
+
+def test_rules_compiled_during_validation_are_reused(use_db, monkeypatch):
+    use_db(rules_db())
+    logic.registry.snapshot()   # loads and validates, compiling every rule once
+
+    def fail(std):
+        raise AssertionError(f"recompiled {std}")
+    monkeypatch.setattr(logic, "compile_rule", fail)
+    monkeypatch.setattr(rules, "compile_rule", fail)
+    analyze_batch(BATCH)
+    limits = [s["limit"] for res in analyze_batch(BATCH, mode="results", authorities=["Ratio Check", "Either"])
+              for s in res["standards"]]
+    assert limits == ["ratio to Conductivity Max 0.8", "Max 0 or Total Coliforms Max 0"]
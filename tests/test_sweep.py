@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+import sweep
+
+RATES = [r / 4 for r in range(-20, 41)]
+PERIODS = list(range(1, 51))
+
+
+def proposal_population(p_current, rate, years, geometric):
+    """Population exactly as generate_proposal() computes it, in Python ints"""
+    if geometric:
+        return int(p_current * (1 + rate / 100) ** years)
+    return int(p_current + (years * int((rate / 100) * p_current)))
+
+
+@pytest.mark.parametrize("community", [sweep.GEOMETRIC, "Village (Arithmetic)"])
+def test_population_matches_generate_proposal(community):
+    inputs = {"type": community, "pop_current": 123457}
+    result = sweep.sweep(inputs, RATES, PERIODS)
+    expected = [[proposal_population(123457, r, y, community == sweep.GEOMETRIC) for y in PERIODS] for r in RATES]
+    assert result.population.tolist() == expected
+
+
+@pytest.mark.parametrize("community, pop, rates", [
+    (sweep.GEOMETRIC, 5000, [300]),
+    (sweep.GEOMETRIC, 5000, [float("nan")]),
+    ("Village (Arithmetic)", 10 ** 18, [900]),
+    ("Village (Arithmetic)", 10 ** 30, [1]),
+])
+def test_out_of_range_population_is_rejected(community, pop, rates):
+    with pytest.raises(ValueError):
+        sweep.sweep({"type": community, "pop_current": pop}, rates, [60])
+
+
+def test_large_population_in_range_is_exact():
+    result = sweep.sweep({"type": "Village (Arithmetic)", "pop_current": 10 ** 18}, [3], [1])
+    assert result.population.dtype == np.int64
+    assert int(result.population[0, 0]) == proposal_population(10 ** 18, 3, 1, False)
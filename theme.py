@@ -0,0 +1,257 @@
+import base64
+
+# --- COLORS ---
+THEMES = {
+    'light': {
+        "bg_color": "#F0F2F6",
+        "card_bg": "#FFFFFF",
+        "text_color": "#111827",    # Darker Black for better visibility in Light Mode
+        "border_color": "#9CA3AF",
+        "input_bg": "#FFFFFF",
+        "subtext_color": "#4B5563",
+        "header_bg": "linear-gradient(135deg, #1E3A8A 0%, #3B82F6 100%)",
+        "stat_box_bg": "#F0FDFA",
+        "stat_box_border": "#CCFBF1",
+    },
+    'dark': {
+        "bg_color": "#0E1117",
+        "card_bg": "#1F2937",
+        "text_color": "#F9FAFB",
+        "border_color": "#4B5563",
+        "input_bg": "#111827",
+        "subtext_color": "#D1D5DB",
+        "header_bg": "linear-gradient(135deg, #111827 0%, #1F2937 100%)",
+        "stat_box_bg": "#134E4A",
+        "stat_box_border": "#0F766E",
+    },
+}
+
+# EMBEDDED SVG LOGO
+svg_logo = """
+<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100" fill="none" stroke="white" stroke-width="5" stroke-linecap="round" stroke-linejoin="round">
+  <path d="M50 15 L55 5 L65 5 L70 15 L80 18 L90 10 L95 15 L88 25 L92 35 L100 40 L100 50 L92 55 L88 65 L95 75 L90 80 L80 72 L70 75 L65 85 L55 85 L50 75 L45 85 L35 85 L30 75 L20 72 L10 80 L5 75 L12 65 L8 55 L0 50 L0 40 L8 35 L12 25 L5 15 L10 10 L20 18 L30 15 L35 5 L45 5 L50 15 Z" fill="none" stroke="white" stroke-width="3"/>
+  <path d="M50 25 Q30 55 30 70 A20 20 0 0 0 70 70 Q70 55 50 25 Z" fill="white" stroke="none"/>
+</svg>
+"""
+logo_b64 = base64.b64encode(svg_logo.encode()).decode()
+
+# --- CSS STYLING ---
+def build_stylesheet(bg_color, card_bg, text_color, border_color, input_bg, subtext_color,
+                     header_bg, stat_box_bg, stat_box_border):
+    return f"""
+<style>
+    /* 1. GLOBAL LAYOUT */
+    [data-testid="stAppViewContainer"] {{
+        background-color: {bg_color};
+        color: {text_color};
+        overflow-x: hidden;
+    }}
+    [data-testid="stHeader"] {{ display: none; }}
+    footer {{ display: none; }}
+
+    .block-container {{
+        max_width: 1000px;
+        padding-top: 140px; 
+        padding-bottom: 2rem;
+    }}
+
+    /* 2. FIXED HEADER */
+    .header-container {{
+        position: fixed;
+        top: 0; left: 0; width: 100%; height: 120px;
+        background: {header_bg};
+        z-index: 99990;
+        box-shadow: 0 4px 10px rgba(0,0,0,0.2);
+        display: flex; justify-content: center;
+    }}
+    
+    .header-inner {{
+        width: 100%; max_width: 1000px; padding: 0 20px;
+        display: flex; align-items: center; height: 100%;
+        color: white; gap: 20px; position: relative;
+    }}
+
+    .logo-img {{ width: 60px; height: 60px; filter: drop-shadow(0 2px 4px rgba(0,0,0,0.2)); }}
+    .header-text {{ display: flex; flex-direction: column; }}
+    .header-title {{ font-size: 1.8rem; font-weight: 800; margin: 0; line-height: 1.2; }}
+    .header-subtitle {{ font-size: 0.9rem; font-weight: 300; opacity: 0.9; }}
+
+    /* 3. THEME BUTTON (FIXED TOP RIGHT) */
+    .theme-btn-wrapper {{
+        position: fixed; top: 38px; right: 20px; z-index: 100000;
+    }}
+    
+    .theme-btn-wrapper button {{
+        background-color: rgba(255,255,255,0.15) !important;
+        color: white !important;
+        border: 1px solid rgba(255,255,255,0.3) !important;
+        width: 45px !important; height: 45px !important;
+        padding: 0 !important; font-size: 1.2rem !important;
+        border-radius: 50% !important;
+    }}
+    .theme-btn-wrapper button:hover {{
+        background-color: rgba(255,255,255,0.3) !important;
+        transform: scale(1.05);
+    }}
+
+    /* 4. FOOTER (DEFAULT: SCROLLING/NOT FIXED for Desktop) */
+    .footer-container {{
+        width: 100vw;
+        position: relative;
+        left: 50%; right: 50%;
+        margin-left: -50vw; margin-right: -50vw;
+        background: {header_bg};
+        color: white; 
+        text-align: center; 
+        padding: 20px;
+        margin-top: 50px; 
+        font-size: 0.8rem;
+    }}
+
+    /* 5. INPUT FIXES */
+    /* Force Input Container Background */
+    div[data-testid="stNumberInput"] div[data-baseweb="input"] {{
+        background-color: {input_bg} !important;
+        border: 1px solid {border_color} !important;
+        color: {text_color} !important;
+    }}
+    /* Actual Input Tag */
+    div[data-testid="stNumberInput"] input {{
+        background-color: {input_bg} !important;
+        color: {text_color} !important;
+        caret-color: {text_color} !important;
+    }}
+    /* Selectbox */
+    div[data-baseweb="select"] > div {{
+        background-color: {input_bg} !important;
+        border: 1px solid {border_color} !important;
+        color: {text_color} !important;
+    }}
+    /* Text/Icon Visibility Fix */
+    .stSelectbox label, .stNumberInput label {{ color: {text_color} !important; font-weight: 600; }}
+    div[data-baseweb="select"] span {{ color: {text_color} !important; }}
+    
+    /* FORCE ICONS DARK IN LIGHT MODE (Arrows, Steppers) */
+    div[data-baseweb="select"] svg, div[data-testid="stNumberInput"] svg {{
+        fill: {text_color} !important;
+        color: {text_color} !important;
+    }}
+
+    /* 6. CARDS */
+    .custom-card {{
+        background-color: {card_bg};
+        padding: 1.5rem;
+        border-radius: 12px;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.05);
+        margin-bottom: 1rem;
+        border: 1px solid {border_color};
+        color: {text_color};
+    }}
+    .card-title {{ font-size: 1.2rem; font-weight: 700; color: #3B82F6; margin-bottom: 5px; }}
+    .card-subtitle {{ font-size: 0.85rem; color: {subtext_color}; margin-bottom: 15px; }}
+    
+    div[data-testid="stButton"] > button {{ border-radius: 8px !important; font-weight: 600; }}
+    button[kind="primary"] {{ background-color: #FF4B4B !important; color: white !important; border: none; }}
+
+    /* 7. MOBILE OPTIMIZATION */
+    @media (max-width: 600px) {{
+        .header-container {{ height: 90px; }}
+        .logo-img {{ width: 40px; height: 40px; }}
+        .header-title {{ font-size: 1.1rem; }}
+        .header-subtitle {{ font-size: 0.7rem; }}
+        
+        .theme-btn-wrapper {{ top: 22px; right: 15px; width: 35px; height: 35px; }}
+        .theme-btn-wrapper button {{ width: 35px !important; height: 35px !important; font-size: 1rem !important; }}
+        
+        /* FOOTER FIXED ON MOBILE ONLY */
+        .footer-container {{
+            position: fixed !important;
+            bottom: 0 !important;
+            left: 0 !important;
+            margin: 0 !important;
+            width: 100% !important;
+            z-index: 99999 !important;
+            padding: 10px !important;
+        }}
+        .footer-extra {{ display: none; }}
+        
+        /* Adjust padding so content doesn't hide behind fixed footer */
+        .block-container {{ 
+            padding-top: 110px; 
+            padding-bottom: 80px !important; 
+        }}
+
+        /* Horizontal List on Mobile */
+        [data-testid="stVerticalBlockBorderWrapper"] [data-testid="stHorizontalBlock"] {{
+            display: flex !important;
+            flex-direction: row !important;
+            flex-wrap: nowrap !important;
+            align-items: center !important;
+            gap: 5px !important;
+        }}
+        [data-testid="stVerticalBlockBorderWrapper"] [data-testid="column"]:nth-of-type(1) {{ flex: 2 !important; min-width: 0 !important; }}
+        [data-testid="stVerticalBlockBorderWrapper"] [data-testid="column"]:nth-of-type(2) {{ flex: 1 !important; }}
+        [data-testid="stVerticalBlockBorderWrapper"] [data-testid="column"]:nth-of-type(3),
+        [data-testid="stVerticalBlockBorderWrapper"] [data-testid="column"]:nth-of-type(4) {{ flex: 0 0 35px !important; min-width: 35px !important; }}
+        [data-testid="stVerticalBlockBorderWrapper"] p {{ font-size: 0.8rem !important; }}
+    }}
+
+    /* RESULT CARDS */
+    .result-card {{ border: 1px solid {border_color}; border-radius: 8px; overflow: hidden; margin-bottom: 10px; background: {card_bg}; color: {text_color}; }}
+    .result-header {{ background: #0284C7; color: white; padding: 10px 15px; font-weight: 600; display: flex; justify-content: space-between; }}
+    .result-body {{ padding: 15px; display: flex; gap: 10px; flex-wrap: wrap; }}
+    .standard-box {{ flex: 1; background: {bg_color}; padding: 8px; border-radius: 6px; border: 1px solid {border_color}; min-width: 150px; color: {text_color}; }}
+    .status-badge {{ display: inline-block; padding: 2px 8px; border-radius: 4px; font-size: 0.7rem; font-weight: 700; margin-top: 4px; color: #1F2937; }}
+    .status-pass {{ background: #DCFCE7; color: #166534; }}
+    .status-fail {{ background: #FEE2E2; color: #991B1B; }}
+    .health-box {{ margin-top: 10px; background: #F0FDF4; border: 1px solid #BBF7D0; padding: 10px; border-radius: 6px; color: #166534; font-size: 0.85rem; }}
+    .health-box-fail {{ background: #FEF2F2; border: 1px solid #FECACA; color: #991B1B; }}
+    .summary-container {{ display: flex; justify-content: space-around; text-align: center; padding: 15px; background: {stat_box_bg}; border-radius: 12px; margin-top: 15px; border: 1px solid {stat_box_border}; color: {text_color}; }}
+    .stat-number {{ font-size: 1.5rem; font-weight: 800; color: #0D9488; }}
+    .stat-label {{ font-size: 0.7rem; text-transform: uppercase; color: {subtext_color}; }}
+    
+    [data-testid="stVerticalBlockBorderWrapper"] > div {{ border-color: {border_color} !important; }}
+</style>
+"""
+
+
+def build_header(logo_b64):
+    return f"""
+<div class="header-container">
+    <div class="header-inner">
+        <img class="logo-img" src="data:image/svg+xml;base64,{logo_b64}"/>
+        <div class="header-text">
+            <div class="header-title">Water Quality System</div>
+            <div class="header-subtitle">Professional Civil Engineering Platform</div>
+        </div>
+    </div>
+</div>
+"""
+
+
+# Built once per process; every rerun and session reuses these strings
+STYLESHEETS = {name: build_stylesheet(**colors) for name, colors in THEMES.items()}
+HEADER_HTML = build_header(logo_b64)
+
+
+if __name__ == "__main__":
+    import time
+
+    # Per-rerun cost of rebuilding the assets vs. looking up the precomputed ones
+    n = 2000
+    start = time.perf_counter()
+    for _ in range(n):
+        for colors in THEMES.values():
+            build_stylesheet(**colors)
+            build_header(base64.b64encode(svg_logo.encode()).decode())
+    rebuild_us = (time.perf_counter() - start) / (n * len(THEMES)) * 1e6
+
+    start = time.perf_counter()
+    for _ in range(n):
+        for name in THEMES:
+            STYLESHEETS[name], HEADER_HTML
+    lookup_us = (time.perf_counter() - start) / (n * len(THEMES)) * 1e6
+
+    print(f"rebuild per rerun: {rebuild_us:.2f} us")
+    print(f"cached per rerun:  {lookup_us:.3f} us")
+    print(f"stylesheet size:   {len(STYLESHEETS['light'])} chars")